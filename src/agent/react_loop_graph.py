@@ -13,6 +13,7 @@ Design:
 
 import json
 from dataclasses import dataclass
+from functools import partial
 from typing import Any, Callable, TypedDict
 
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
@@ -22,6 +23,7 @@ from langgraph.graph import END, StateGraph
 from src.agent.llm import get_executor_llm
 from src.agent.react_category_prompts import react_system_prompt_all
 from src.context import api as context_api
+from src.context.parallel import run_parallel
 from src.context.sql_tools import safe_sql_query
 
 
@@ -42,6 +44,13 @@ ToolFn = Callable[..., dict[str, Any]]
 
 @dataclass(frozen=True)
 class ToolRegistry:
+    """Tool name -> callable.
+
+    Tools from a caller-supplied registry are run one at a time, in call order. Only the
+    built-in `default_tool_registry()` tools (each opens its own DB connection and shares
+    no state) run concurrently when one step issues several calls.
+    """
+
     tools: dict[str, ToolFn]
 
 
@@ -76,6 +85,8 @@ def build_react_graph(
 ):
     """Build a two-node ReAct loop graph."""
 
+    # Concurrency is only known to be safe for the built-in tools (see ToolRegistry).
+    concurrent_tools = registry is None
     registry = registry or default_tool_registry()
     llm = llm or get_executor_llm()
 
@@ -137,21 +148,26 @@ def build_react_graph(
         used: list[str] = list(state.get("tools_used") or [])
         calls: list[dict[str, Any]] = list(state.get("tool_calls") or [])
 
+        # Resolve every call first, then run the known tools (concurrently for the built-in
+        # registry; each opens its own connection). Observations are appended in call order.
+        planned: list[tuple[str | None, Any, ToolFn | None, dict[str, Any]]] = []
         for tc in tool_calls:
             name = tc.get("name")
-            args = tc.get("args") or {}
-            tool_call_id = tc.get("id")
-
             fn = registry.tools.get(name)
+            final_args = dict(tc.get("args") or {})
+            if fn is not None and db_path:
+                final_args = {**final_args, "db_path": db_path}
+            planned.append((name, tc.get("id"), fn, final_args))
+
+        runnable = [partial(fn, **final_args) for _, _, fn, final_args in planned if fn is not None]
+        outputs = iter(run_parallel(*runnable) if concurrent_tools else [call() for call in runnable])
+
+        for name, tool_call_id, fn, final_args in planned:
             if fn is None:
                 msgs.append(ToolMessage(content=json.dumps({"error": "unknown_tool"}), tool_call_id=tool_call_id))
                 continue
 
-            final_args = dict(args)
-            if db_path:
-                final_args = {**final_args, "db_path": db_path}
-
-            res = fn(**final_args)
+            res = next(outputs)
             results[name] = res
             used.append(name)
             calls.append({"tool_name": name, "args": final_args})
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+"""Concurrent execution of independent context tools.
+
+Tools share no state: each opens its own SQLite connection via `db_conn`, and
+sqlite3 releases the GIL while SQLite does I/O and query work, so independent
+tool calls (e.g. `get_latency_trends` + `get_quality_summary`) overlap in threads.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+MAX_WORKERS = 4
+
+
+def run_parallel(*callables: Callable[[], Any]) -> list[Any]:
+    """Run zero-arg callables concurrently; results are returned in argument order.
+
+    Exceptions propagate from the first failing callable (same as calling them serially).
+    """
+    if len(callables) <= 1:
+        return [fn() for fn in callables]
+    with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(callables))) as pool:
+        futures = [pool.submit(fn) for fn in callables]
+        return [f.result() for f in futures]
@@ -18,12 +18,17 @@ import json
 import time
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from src.context._common import default_db_path, error
 from src.db.connection import db_conn, fetch_all
 
 
+# Clock behind the query-timeout deadline. Module-level (not a safe_sql_query argument) so
+# it stays out of the tool schema the LLM sees; tests swap it to trigger the timeout instantly.
+_deadline_clock: Callable[[], float] = time.perf_counter
+
+
 def _now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).strftime("%Y-%m-%dT%H:%M:%SZ")
 
@@ -137,10 +142,11 @@ def safe_sql_query(
 
         with db_conn(db_path) as conn:
             # Timeout enforcement via progress handler.
-            deadline = time.perf_counter() + float(timeout_sec)
+            clock = _deadline_clock
+            deadline = clock() + float(timeout_sec)
 
             def _progress() -> int:
-                return 1 if time.perf_counter() > deadline else 0
+                return 1 if clock() > deadline else 0
 
             conn.set_progress_handler(_progress, 1000)
             try:
@@ -9,10 +9,76 @@ Tools:
 - `get_request_volume`
 """
 
-from typing import Any, Literal
+import threading
+from array import array
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Iterator, Literal
 
 from src.context._common import assert_read_only_sql, db_now, default_db_path, error, parse_rfc3339_z, parse_timeish, to_rfc3339_z
-from src.db.connection import db_conn, fetch_all
+from src.db.connection import db_conn, fetch_all, read_transaction
+
+
+# Bucket start as RFC3339Z (matches the stored `created_at` format).
+_PERIOD_EXPR = {
+    "hour": "(SUBSTR(created_at, 1, 13) || ':00:00Z')",
+    "day": "(SUBSTR(created_at, 1, 10) || 'T00:00:00Z')",
+}
+_PERIOD_STEP = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+# Percentiles of closed buckets, keyed by (db, granularity, period, deployment, fingerprint).
+# A closed bucket never changes, so overlapping trend queries (e.g. "last 24h" polled
+# every minute) only recompute the partial/open buckets at the window edges. The
+# fingerprint is the row/error/latency counts plus _LATENCY_CHECKSUM_SQL, a per-row hash
+# of (rowid, latency_ms) summed over the bucket: inserted or deleted rows change it, and
+# so does any rewrite of a stored latency, except with ~1/_CHECKSUM_MOD chance of a
+# collision. (Moment statistics alone are not enough: {102, 106, 107} and {103, 104, 108}
+# share count, sum, sum of squares, min and max.)
+_BUCKET_CACHE_MAXSIZE = 4096
+_bucket_cache: OrderedDict[tuple[Any, ...], tuple[int | None, int | None]] = OrderedDict()
+_bucket_cache_lock = threading.Lock()
+
+# Prime modulus; x < 2**31 keeps x * x inside SQLite's 64-bit integers.
+_CHECKSUM_MOD = 2147483647
+# Squaring makes each row's term depend non-linearly on its latency and its rowid, so
+# offsetting edits (+1 here, -1 there) do not cancel out in the sum.
+_LATENCY_CHECKSUM_SQL = (
+    f"COALESCE(SUM(((rowid * 1000003 + latency_ms) % {_CHECKSUM_MOD})"
+    f" * ((rowid * 1000003 + latency_ms) % {_CHECKSUM_MOD}) % {_CHECKSUM_MOD}), 0)"
+)
+
+
+def _cached_bucket_percentiles(key: tuple[Any, ...]) -> tuple[int | None, int | None] | None:
+    with _bucket_cache_lock:
+        value = _bucket_cache.get(key)
+        if value is not None:
+            _bucket_cache.move_to_end(key)
+        return value
+
+
+def _store_bucket_percentiles(key: tuple[Any, ...], value: tuple[int | None, int | None]) -> None:
+    with _bucket_cache_lock:
+        _bucket_cache[key] = value
+        _bucket_cache.move_to_end(key)
+        while len(_bucket_cache) > _BUCKET_CACHE_MAXSIZE:
+            _bucket_cache.popitem(last=False)
+
+
+def _contiguous_ranges(periods: list[str], *, step: timedelta) -> Iterator[tuple[datetime, datetime]]:
+    """Merge sorted bucket starts into [start, end) ranges of adjacent buckets."""
+    start: datetime | None = None
+    end: datetime | None = None
+    for p in periods:
+        p_start = parse_rfc3339_z(p)
+        if end is not None and p_start == end:
+            end = p_start + step
+            continue
+        if start is not None and end is not None:
+            yield start, end
+        start, end = p_start, p_start + step
+    if start is not None and end is not None:
+        yield start, end
 
 
 def get_latency_trends(
@@ -33,7 +99,7 @@ def get_latency_trends(
     db_path = db_path or default_db_path()
 
     try:
-        with db_conn(db_path) as conn:
+        with db_conn(db_path) as conn, read_transaction(conn):
             now = db_now(conn)
             try:
                 since_dt = parse_timeish(since, now=now)
@@ -59,54 +125,110 @@ def get_latency_trends(
             params.append(to_rfc3339_z(until_dt))
 
             where_sql = f"WHERE {' AND '.join(where)}"
+            period_expr = _PERIOD_EXPR[granularity]
 
+            # Counts + a cheap fingerprint per bucket are aggregated in SQL; only the
+            # percentiles (SQLite has no built-in p50/p95) need the raw latencies.
             sql = f"""
-                SELECT created_at, deployment_id, latency_ms, status
+                SELECT
+                    {period_expr} AS period,
+                    deployment_id,
+                    COUNT(*) AS request_count,
+                    SUM(CASE WHEN status IN ('error', 'timeout') THEN 1 ELSE 0 END) AS error_count,
+                    COUNT(latency_ms) AS latency_count,
+                    {_LATENCY_CHECKSUM_SQL} AS latency_checksum
                 FROM requests
                 {where_sql}
-                ORDER BY created_at ASC;
+                GROUP BY period, deployment_id
+                ORDER BY period ASC, deployment_id ASC;
             """.strip()
             assert_read_only_sql(sql)
-            rows = fetch_all(conn, sql, params)
-
-        # Group in Python to compute percentiles (SQLite has no built-in p50/p95).
-        def bucket(ts: str) -> str:
-            dt = parse_rfc3339_z(ts)
-            if granularity == "hour":
-                dt = dt.replace(minute=0, second=0, microsecond=0)
-            else:
-                dt = dt.replace(hour=0, minute=0, second=0, microsecond=0)
-            return to_rfc3339_z(dt)
-
-        groups: dict[tuple[str, str], list[dict[str, Any]]] = {}
-        for r in rows:
-            ts = r.get("created_at")
-            dep = r.get("deployment_id")
-            if not isinstance(ts, str) or not ts or not isinstance(dep, str) or not dep:
-                continue
-            k = (bucket(ts), dep)
-            groups.setdefault(k, []).append(r)
+            agg_rows = fetch_all(conn, sql, params)
+
+            step = _PERIOD_STEP[granularity]
+            cache_key_base = (str(Path(db_path).resolve()), granularity)
+            percentiles: dict[tuple[str, str], tuple[int | None, int | None]] = {}
+            missing_periods: set[str] = set()
+            for r in agg_rows:
+                k = (r["period"], r["deployment_id"])
+                period_start = parse_rfc3339_z(r["period"])
+                period_end = period_start + step
+                # Only closed buckets fully inside the requested window are immutable.
+                if period_start >= since_dt and period_end <= until_dt and period_end <= now:
+                    cache_key = (
+                        *cache_key_base,
+                        *k,
+                        int(r["request_count"]),
+                        int(r["error_count"]),
+                        int(r["latency_count"]),
+                        int(r["latency_checksum"]),
+                    )
+                    r["cache_key"] = cache_key
+                    cached = _cached_bucket_percentiles(cache_key)
+                    if cached is not None:
+                        percentiles[k] = cached
+                        continue
+                missing_periods.add(r["period"])
+
+            # Contiguous C ints (8 bytes/value, any SQLite INTEGER fits) rather than a list
+            # of boxed Python ints.
+            latencies_by_group: dict[tuple[str, str], array] = {}
+            if missing_periods:
+                # Fetch raw latencies only for periods with uncached buckets, merging
+                # adjacent periods into contiguous time ranges.
+                range_sql: list[str] = []
+                range_params: list[Any] = []
+                for start, end in _contiguous_ranges(sorted(missing_periods), step=step):
+                    range_sql.append("(created_at >= ? AND created_at < ?)")
+                    range_params.extend([to_rfc3339_z(start), to_rfc3339_z(end)])
+
+                lat_sql = f"""
+                    SELECT {period_expr} AS period, deployment_id, latency_ms
+                    FROM requests
+                    {where_sql}
+                      AND latency_ms IS NOT NULL
+                      AND ({' OR '.join(range_sql)});
+                """.strip()
+                assert_read_only_sql(lat_sql)
+                for r in fetch_all(conn, lat_sql, params + range_params):
+                    k = (r["period"], r["deployment_id"])
+                    v = r["latency_ms"]
+                    # Malformed values (REAL/TEXT stored in latency_ms) are skipped, not fatal.
+                    if k in percentiles or not isinstance(v, int):
+                        continue
+                    buf = latencies_by_group.get(k)
+                    if buf is None:
+                        buf = latencies_by_group[k] = array("q")
+                    buf.append(v)
 
         def percentile_int(values: list[int], p: float) -> int | None:
             if not values:
                 return None
-            vs = sorted(values)
-            idx = int((len(vs) - 1) * p)
-            return int(vs[max(0, min(idx, len(vs) - 1))])
+            idx = int((len(values) - 1) * p)
+            return int(values[max(0, min(idx, len(values) - 1))])
 
         data: list[dict[str, Any]] = []
         total_requests = 0
         weighted_p50_sum = 0.0
         weighted_p95_sum = 0.0
 
-        for (period, dep), rs in sorted(groups.items(), key=lambda x: (x[0][0], x[0][1])):
-            latencies = [int(v) for v in (r.get("latency_ms") for r in rs) if isinstance(v, int)]
-            n = len(rs)
+        # Rows are already ordered by (period, deployment_id); build output in one pass.
+        for g in agg_rows:
+            period = g["period"]
+            dep = g["deployment_id"]
+            n = int(g["request_count"])
             if n == 0:
                 continue
-            p50 = percentile_int(latencies, 0.50)
-            p95 = percentile_int(latencies, 0.95)
-            errors = sum(1 for r in rs if r.get("status") in ("error", "timeout"))
+            k = (period, dep)
+            if k in percentiles:
+                p50, p95 = percentiles[k]
+            else:
+                latencies = sorted(latencies_by_group.get(k, ()))
+                p50 = percentile_int(latencies, 0.50)
+                p95 = percentile_int(latencies, 0.95)
+                if "cache_key" in g:
+                    _store_bucket_percentiles(g["cache_key"], (p50, p95))
+            errors = int(g["error_count"] or 0)
             err_rate = errors / n if n else 0.0
 
             data.append(
@@ -151,7 +273,7 @@ def get_quality_summary(
     db_path = db_path or default_db_path()
 
     try:
-        with db_conn(db_path) as conn:
+        with db_conn(db_path) as conn, read_transaction(conn):
             now = db_now(conn)
             try:
                 since_dt = parse_timeish(since, now=now)
@@ -240,8 +362,12 @@ def get_request_volume(
             start_s = to_rfc3339_z(since_dt)
             end_s = to_rfc3339_z(until_dt)
 
-            # Period formatting: day -> YYYY-MM-DD (docs example), hour -> RFC3339Z hour bucket.
-            period_expr = "SUBSTR(r.created_at, 1, 10)" if granularity == "day" else "(SUBSTR(r.created_at, 1, 13) || ':00:00Z')"
+            # Group by an integer bucket (epoch hours/days) and format once per output row:
+            # day -> YYYY-MM-DD (docs example), hour -> RFC3339Z hour bucket. Rows whose
+            # created_at strftime() cannot parse have no bucket and are left out.
+            bucket_sec = 86400 if granularity == "day" else 3600
+            period_fmt = "%Y-%m-%d" if granularity == "day" else "%Y-%m-%dT%H:00:00Z"
+            period_expr = f"(CAST(strftime('%s', r.created_at) AS INTEGER) / {bucket_sec})"
 
             if group_by == "tier":
                 group_expr = "u.tier_id"
@@ -266,6 +392,7 @@ def get_request_volume(
                 {join_sql}
                 WHERE r.created_at >= ?
                   AND r.created_at <= ?
+                  AND {period_expr} IS NOT NULL
                 GROUP BY period, grp
                 ORDER BY period ASC, grp ASC;
             """.strip()
@@ -273,26 +400,28 @@ def get_request_volume(
             rows = fetch_all(conn, sql, [start_s, end_s])
 
             data: list[dict[str, Any]] = []
-            totals: dict[str, dict[str, Any]] = {}
+            # grp -> [requests, cost_usd]; one hash lookup per row.
+            totals_acc: defaultdict[str, list[Any]] = defaultdict(lambda: [0, 0.0])
             for r in rows:
-                grp = r.get("grp")
+                grp = r["grp"]
                 if grp is None:
                     continue
                 grp_s = str(grp)
-                rc = int(r.get("request_count") or 0)
-                cost = float(r.get("total_cost_usd") or 0.0)
+                rc = int(r["request_count"] or 0)
+                cost = float(r["total_cost_usd"] or 0.0)
                 data.append(
                     {
-                        "period": r.get("period"),
+                        "period": datetime.fromtimestamp(r["period"] * bucket_sec, tz=timezone.utc).strftime(period_fmt),
                         "group": grp_s,
                         "request_count": rc,
                         "total_cost_usd": cost,
                     }
                 )
-                totals.setdefault(grp_s, {"requests": 0, "cost_usd": 0.0})
-                totals[grp_s]["requests"] += rc
-                totals[grp_s]["cost_usd"] += cost
+                t = totals_acc[grp_s]
+                t[0] += rc
+                t[1] += cost
 
+            totals = {grp_s: {"requests": t[0], "cost_usd": t[1]} for grp_s, t in totals_acc.items()}
             return {"data": data, "totals": totals}
 
     except Exception as e:
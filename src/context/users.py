@@ -11,7 +11,7 @@ from datetime import timedelta
 from typing import Any
 
 from src.context._common import assert_read_only_sql, db_now, default_db_path, error, to_rfc3339_z
-from src.db.connection import db_conn, fetch_one
+from src.db.connection import db_conn, fetch_one, read_transaction
 
 
 def get_user_context(*, user_id: str, db_path: str | None = None) -> dict[str, Any]:
@@ -23,44 +23,45 @@ def get_user_context(*, user_id: str, db_path: str | None = None) -> dict[str, A
     db_path = db_path or default_db_path()
 
     try:
-        with db_conn(db_path) as conn:
+        with db_conn(db_path) as conn, read_transaction(conn):
             now = db_now(conn)
 
+            start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+            end = start + timedelta(days=1)
+            start_s = to_rfc3339_z(start)
+            end_s = to_rfc3339_z(end)
+
+            # One statement: user/tier lookup + today's usage (no row => user not found).
             sql = """
+                WITH usage AS (
+                    SELECT
+                        COALESCE(SUM(cost_usd), 0) AS daily_budget_used_usd,
+                        COUNT(*) AS requests_today
+                    FROM requests
+                    WHERE user_id = ?
+                      AND created_at >= ?
+                      AND created_at < ?
+                )
                 SELECT
                     u.id,
                     u.tier_id AS tier,
                     COALESCE(u.latency_sla_p95_ms_override, t.latency_sla_p95_ms) AS latency_sla_ms,
-                    u.daily_budget_usd
+                    u.daily_budget_usd,
+                    usage.daily_budget_used_usd,
+                    usage.requests_today
                 FROM users u
                 JOIN tiers t ON t.id = u.tier_id
+                CROSS JOIN usage
                 WHERE u.id = ?
                 LIMIT 1;
             """.strip()
             assert_read_only_sql(sql)
-            u = fetch_one(conn, sql, [user_id])
+            u = fetch_one(conn, sql, [user_id, start_s, end_s, user_id])
             if not u:
                 return error(f"User not found: {user_id}", code="NOT_FOUND")
 
-            start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            end = start + timedelta(days=1)
-            start_s = to_rfc3339_z(start)
-            end_s = to_rfc3339_z(end)
-
-            usage_sql = """
-                SELECT
-                    COALESCE(SUM(cost_usd), 0) AS daily_budget_used_usd,
-                    COUNT(*) AS requests_today
-                FROM requests
-                WHERE user_id = ?
-                  AND created_at >= ?
-                  AND created_at < ?;
-            """.strip()
-            assert_read_only_sql(usage_sql)
-            usage = fetch_one(conn, usage_sql, [user_id, start_s, end_s]) or {}
-
-            used = float(usage.get("daily_budget_used_usd") or 0.0)
-            requests_today = int(usage.get("requests_today") or 0)
+            used = float(u.get("daily_budget_used_usd") or 0.0)
+            requests_today = int(u.get("requests_today") or 0)
             budget = u.get("daily_budget_usd")
             remaining: float | None = None
             if budget is not None:
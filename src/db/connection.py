@@ -17,15 +17,26 @@ def _dict_row_factory(cursor: sqlite3.Cursor, row: tuple[Any, ...]) -> dict[str,
     return {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
 
 
-def connect(db_path: str) -> sqlite3.Connection:
+# sqlite3 caches prepared statements per connection, keyed by SQL text (default: 128).
+STATEMENT_CACHE_SIZE = 256
+
+
+def connect(db_path: str, *, autocommit: bool = False) -> sqlite3.Connection:
     """
     Open a SQLite connection with:
     - parent directory auto-created
     - foreign keys enforced
     - row_factory returning dicts
+    - a larger prepared-statement cache (repeated tool SQL skips re-parsing)
+    - optional autocommit (`isolation_level=None`): sqlite3 never issues implicit
+      BEGINs; callers that need a transaction open one explicitly
     """
     Path(os.path.dirname(db_path)).mkdir(parents=True, exist_ok=True)
-    conn = sqlite3.connect(db_path)
+    conn = sqlite3.connect(
+        db_path,
+        cached_statements=STATEMENT_CACHE_SIZE,
+        isolation_level=None if autocommit else "",
+    )
     conn.row_factory = _dict_row_factory
     conn.execute("PRAGMA foreign_keys = ON;")
     return conn
@@ -74,10 +85,34 @@ def fetch_all(conn: sqlite3.Connection, sql: str, params: Iterable[Any] | None =
 def db_conn(db_path: str) -> Iterator[sqlite3.Connection]:
     """
     Context manager for opening/closing connections.
+
+    Used by the read-only tools, so the connection is opened in autocommit mode;
+    multi-statement reads group themselves with `read_transaction`.
     """
-    conn = connect(db_path)
+    conn = connect(db_path, autocommit=True)
     try:
         yield conn
     finally:
         conn.close()
 
+
+@contextmanager
+def read_transaction(conn: sqlite3.Connection) -> Iterator[sqlite3.Connection]:
+    """
+    Run a group of SELECTs inside one explicit deferred transaction.
+
+    Why: multi-query tools then read from a single consistent snapshot and SQLite
+    takes the shared lock once, instead of starting an implicit transaction per statement.
+    Nested use is a no-op (the outer transaction owns commit/rollback).
+    """
+    if conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN DEFERRED")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    else:
+        conn.execute("COMMIT")
@@ -151,7 +151,7 @@ CREATE INDEX idx_deployments_model ON deployments(model_id);
 CREATE INDEX idx_deployments_backend ON deployments(backend_id);
 
 CREATE INDEX idx_requests_user ON requests(user_id);
-CREATE INDEX idx_requests_created ON requests(created_at);
+CREATE INDEX idx_requests_created ON requests(created_at, deployment_id);
 CREATE INDEX idx_requests_deployment ON requests(deployment_id);
 CREATE INDEX idx_requests_model ON requests(model_id);
 CREATE INDEX idx_requests_backend ON requests(backend_id);
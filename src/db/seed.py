@@ -21,9 +21,16 @@ import json
 import os
 import random
 import sqlite3
-from dataclasses import dataclass
+import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta, timezone
-from typing import Callable, Iterable, Iterator
+from itertools import chain, islice, repeat
+from math import sqrt
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Callable, Iterable, Iterator, Mapping, NamedTuple
 
 from src.db.connection import connect, init_db
 
@@ -41,6 +48,11 @@ class SeedConfig:
     insert_batch_size: int = 5000
     # deployment_state_current will be computed from the last window_sec of requests.
     window_sec: int = 300
+    # Processes generating request rows. 1 keeps the single shared rng stream (the reference
+    # dataset). >1 draws each user's requests/quality rows from an rng derived from
+    # (rng_seed, user id): still deterministic, and independent of the worker count, but a
+    # different dataset from workers=1.
+    workers: int = 1
     # Reporting
     write_report: bool = True
     report_dir: str | None = None
@@ -58,6 +70,56 @@ def _default_db_path() -> str:
     return os.getenv("CONTEXT_DB_PATH", os.path.join(_project_root(), "data", "context.db"))
 
 
+# Request rows are positional tuples in this column order (no per-row dict/named binds).
+_REQUEST_COLUMNS = (
+    "id",
+    "created_at",
+    "user_id",
+    "deployment_id",
+    "model_id",
+    "backend_id",
+    "task_type",
+    "input_tokens",
+    "output_tokens",
+    "latency_ms",
+    "ttft_ms",
+    "decode_toks_per_sec",
+    "cost_usd",
+    "status",
+    "error_code",
+    "router_version",
+    "experiment_id",
+    "routing_reason_json",
+)
+(
+    _REQ_ID,
+    _REQ_CREATED_AT,
+    _REQ_USER_ID,
+    _REQ_DEPLOYMENT_ID,
+    _REQ_MODEL_ID,
+    _REQ_BACKEND_ID,
+    _REQ_TASK_TYPE,
+    _REQ_INPUT_TOKENS,
+    _REQ_OUTPUT_TOKENS,
+    _REQ_LATENCY_MS,
+    _REQ_TTFT_MS,
+    _REQ_DECODE_TPS,
+    _REQ_COST_USD,
+    _REQ_STATUS,
+    _REQ_ERROR_CODE,
+    _REQ_ROUTER_VERSION,
+    _REQ_EXPERIMENT_ID,
+    _REQ_ROUTING_REASON_JSON,
+) = range(len(_REQUEST_COLUMNS))
+
+# INSERTs executed once per batch: one module-level string each, so every call reuses
+# sqlite3's cached prepared statement.
+_SQL_INSERT_REQUESTS = (
+    f"INSERT INTO requests ({', '.join(_REQUEST_COLUMNS)}) VALUES ({', '.join('?' * len(_REQUEST_COLUMNS))})"
+)
+_SQL_INSERT_QUALITY_SCORES = "INSERT INTO quality_scores (request_id, eval_type, score, evaluated_at) VALUES (?, ?, ?, ?)"
+
+
 def to_rfc3339_z(dt: datetime) -> str:
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
@@ -67,8 +129,20 @@ def to_rfc3339_z(dt: datetime) -> str:
 
 def _reset_db(db_path: str) -> None:
     Path(os.path.dirname(db_path)).mkdir(parents=True, exist_ok=True)
-    if os.path.exists(db_path):
-        os.remove(db_path)
+    # Include WAL sidecars so a stale -wal from an interrupted run is never replayed.
+    for path in (db_path, f"{db_path}-wal", f"{db_path}-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+_SEED_PRAGMAS = """
+PRAGMA journal_mode = WAL;
+PRAGMA synchronous = OFF;
+PRAGMA temp_store = MEMORY;
+PRAGMA cache_size = -131072;
+PRAGMA mmap_size = 268435456;
+PRAGMA locking_mode = EXCLUSIVE;
+"""
 
 
 def seed(db_path: str | None = None, *, cfg: SeedConfig | None = None) -> str:
@@ -78,11 +152,13 @@ def seed(db_path: str | None = None, *, cfg: SeedConfig | None = None) -> str:
     db_path = db_path or _default_db_path()
     _reset_db(db_path)
 
-    conn = connect(db_path)
+    # Autocommit mode: _seed_all brackets all inserts in one explicit transaction.
+    conn = connect(db_path, autocommit=True)
     try:
+        # Bulk-load tuning: the DB is rebuilt from scratch, so durability (fsync) is not needed.
+        conn.executescript(_SEED_PRAGMAS)
         init_db(conn, schema_path=_schema_path())
         _seed_all(conn, cfg=cfg, db_path=db_path)
-        conn.commit()
     finally:
         conn.close()
 
@@ -93,12 +169,19 @@ def _seed_all(conn: sqlite3.Connection, *, cfg: SeedConfig, db_path: str) -> Non
     rng = random.Random(cfg.rng_seed)
     window_start = cfg.base_now - timedelta(days=cfg.days)
 
+    # Generated rows are trusted: skip per-row FK enforcement and verify once before COMMIT
+    # (the pragma is a no-op inside a transaction, so it must precede BEGIN).
+    conn.execute("PRAGMA foreign_keys = OFF")
+    # One transaction for every insert (instead of an implicit one per executemany).
+    conn.execute("BEGIN")
+
     tiers = _make_tiers()
     models = _make_models()
     backends = _make_backends()
     deployments = _make_deployments(base_now=cfg.base_now)
     users = _make_users()
     incidents = _make_incidents(rng=rng, window_start=window_start, window_end=cfg.base_now)
+    incident_index = _index_incidents(incidents)
 
     _insert_many(conn, "tiers", tiers, _insert_tiers)
     _insert_many(conn, "models", models, _insert_models)
@@ -108,19 +191,16 @@ def _seed_all(conn: sqlite3.Connection, *, cfg: SeedConfig, db_path: str) -> Non
     _insert_many(conn, "incidents", incidents, _insert_incidents)
 
     perf_schedule = _make_daily_perf_schedule(rng=rng, deployments=deployments, days=cfg.days)
-    req_gen = _generate_requests(
-        rng=rng,
-        users=users,
-        deployments=deployments,
-        window_start=window_start,
-        window_end=cfg.base_now,
-        requests_per_user_per_day=cfg.requests_per_user_per_day,
-        incidents=incidents,
-        perf_schedule=perf_schedule,
-    )
+    gen_kwargs = {
+        "deployments": deployments,
+        "window_start": window_start,
+        "window_end": cfg.base_now,
+        "requests_per_user_per_day": cfg.requests_per_user_per_day,
+        "incident_index": incident_index,
+        "perf_schedule": perf_schedule,
+        "price_per_1k": {d["id"]: _price_per_1k_tokens(d["id"]) for d in deployments},
+    }
 
-    batch: list[dict] = []
-    q_batch: list[dict] = []
     # Report aggregates (computed during generation)
     rep = _ReportBuilder(
         cfg=cfg,
@@ -132,44 +212,65 @@ def _seed_all(conn: sqlite3.Connection, *, cfg: SeedConfig, db_path: str) -> Non
         incidents=incidents,
         perf_schedule=perf_schedule,
     )
-    for req in req_gen:
-        batch.append(req)
-        rep.add_request(req)
-        if rng.random() <= cfg.quality_coverage:
-            q = _make_quality_row(rng=rng, req=req, base_now=cfg.base_now, incidents=incidents)
-            q_batch.append(q)
-            rep.add_quality(q)
-
-        if len(batch) >= cfg.insert_batch_size:
-            _insert_requests(conn, batch)
-            batch.clear()
-        if len(q_batch) >= cfg.insert_batch_size:
-            # FK safety: ensure requests exist before inserting quality_scores.
-            if batch:
-                _insert_requests(conn, batch)
-                batch.clear()
-            _insert_quality_scores(conn, q_batch)
-            q_batch.clear()
-
-    if batch:
-        _insert_requests(conn, batch)
-        batch.clear()
-    if q_batch:
-        # FK safety: quality_scores reference requests.
-        if batch:
-            _insert_requests(conn, batch)
-            batch.clear()
-        _insert_quality_scores(conn, q_batch)
+    # Bulk-build the requests indexes after loading instead of updating each B-tree per row.
+    request_index_ddl = _drop_indexes(conn, "requests")
+    if cfg.workers > 1:
+        # Users are split into one contiguous slice per worker, so the shared gen_kwargs
+        # (schedules, incident index) are pickled once per worker rather than once per user.
+        # Results come back in users order; inserts stay on this connection.
+        slice_len = -(-len(users) // cfg.workers)
+        user_slices = [users[i : i + slice_len] for i in range(0, len(users), slice_len)]
+        with ProcessPoolExecutor(max_workers=cfg.workers) as pool:
+            per_user = chain.from_iterable(
+                pool.map(_generate_user_slice_rows, repeat(cfg), user_slices, repeat(gen_kwargs))
+            )
+            for req_rows, quality_rows in per_user:
+                for req in req_rows:
+                    rep.add_request(req)
+                for q in quality_rows:
+                    rep.add_quality(q)
+                _insert_requests(conn, req_rows)
+                _insert_quality_scores(conn, quality_rows)
+    else:
+        quality_rows: list[tuple] = []
+        base_now_ts = int(cfg.base_now.timestamp())
+
+        def _request_stream() -> Iterator[tuple]:
+            # One pass over the generator: report aggregation and quality sampling ride along.
+            for created_ts, req in _generate_requests(rng=rng, users=users, **gen_kwargs):
+                rep.add_request(req)
+                if rng.random() <= cfg.quality_coverage:
+                    q = _make_quality_row(
+                        rng=rng, req=req, created_ts=created_ts, base_now_ts=base_now_ts, incident_index=incident_index
+                    )
+                    quality_rows.append(q)
+                    rep.add_quality(q)
+                yield req
+
+        # executemany consumes the stream directly, insert_batch_size rows per call (no row
+        # lists); the quality rows sampled along the way are flushed after each chunk.
+        stream = _request_stream()
+        for first in stream:
+            _insert_requests(conn, chain((first,), islice(stream, cfg.insert_batch_size - 1)))
+            _insert_quality_scores(conn, quality_rows)
+            quality_rows.clear()
+    for ddl in request_index_ddl:
+        conn.execute(ddl)
 
     # Compute deployment_state_current from the last cfg.window_sec of requests.
     dep_state = _compute_deployment_state_from_recent_requests(
         conn=conn,
         deployments=deployments,
-        incidents=incidents,
+        incident_index=incident_index,
         window_end=cfg.base_now,
         window_sec=cfg.window_sec,
     )
     _insert_deployment_state_current(conn, dep_state)
+    violations = conn.execute("PRAGMA foreign_key_check").fetchall()
+    if violations:
+        conn.execute("ROLLBACK")
+        raise sqlite3.IntegrityError(f"seed produced {len(violations)} foreign key violations: {violations[:5]}")
+    conn.execute("COMMIT")
     rep.set_deployment_state_current(dep_state)
 
     if cfg.write_report:
@@ -177,6 +278,17 @@ def _seed_all(conn: sqlite3.Connection, *, cfg: SeedConfig, db_path: str) -> Non
         rep.write(report_dir=report_dir)
 
 
+def _drop_indexes(conn: sqlite3.Connection, table: str) -> list[str]:
+    """Drop the explicit (schema.sql) indexes on `table`; returns their DDL for re-creation."""
+    rows = conn.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL",
+        (table,),
+    ).fetchall()
+    for r in rows:
+        conn.execute(f'DROP INDEX "{r["name"]}"')
+    return [r["sql"] for r in rows]
+
+
 def _insert_many(conn: sqlite3.Connection, name: str, rows: list[dict], inserter: Callable[[sqlite3.Connection, list[dict]], None]) -> None:
     if not rows:
         return
@@ -276,15 +388,9 @@ def _base_perf_primitives() -> dict[str, dict[str, float]]:
     return {}
 
 
-def _base_perf_for_deployment(deployment_id: str) -> dict[str, float]:
-    """
-    Baseline TTFT + decode throughput for a deployment (before daily drift and incidents).
-    This is intentionally synthetic and only needs to preserve relative ordering.
-    """
-    model_id, backend_id = deployment_id.split("/", 1)
-
-    # Base per model (approximate relative performance).
-    model_ttft_ms: dict[str, float] = {
+# Base per model (approximate relative performance).
+_MODEL_TTFT_MS: Mapping[str, float] = MappingProxyType(
+    {
         "gpt-4": 160.0,
         "gpt-4-mini": 120.0,
         "gpt-3.5": 110.0,
@@ -296,7 +402,9 @@ def _base_perf_for_deployment(deployment_id: str) -> dict[str, float]:
         "mistral-large": 160.0,
         "mixtral-8x7b": 140.0,
     }
-    model_decode_tps: dict[str, float] = {
+)
+_MODEL_DECODE_TPS: Mapping[str, float] = MappingProxyType(
+    {
         "gpt-4": 55.0,
         "gpt-4-mini": 75.0,
         "gpt-3.5": 85.0,
@@ -308,19 +416,31 @@ def _base_perf_for_deployment(deployment_id: str) -> dict[str, float]:
         "mistral-large": 65.0,
         "mixtral-8x7b": 80.0,
     }
+)
+
+# Backend multipliers: k8s tends to have higher TTFT (queueing) but decent throughput;
+# neocloud has slightly higher variance and sometimes slower decode.
+_BACKEND_TTFT_MULT: Mapping[str, float] = MappingProxyType({"aws": 1.0, "k8s": 1.35, "neocloud": 1.15})
+_BACKEND_DECODE_MULT: Mapping[str, float] = MappingProxyType({"aws": 1.0, "k8s": 0.95, "neocloud": 0.90})
 
-    # Backend multipliers: k8s tends to have higher TTFT (queueing) but decent throughput;
-    # neocloud has slightly higher variance and sometimes slower decode.
-    ttft_mult = {"aws": 1.0, "k8s": 1.35, "neocloud": 1.15}.get(backend_id, 1.2)
-    decode_mult = {"aws": 1.0, "k8s": 0.95, "neocloud": 0.90}.get(backend_id, 0.92)
+
+def _base_perf_for_deployment(deployment_id: str) -> dict[str, float]:
+    """
+    Baseline TTFT + decode throughput for a deployment (before daily drift and incidents).
+    This is intentionally synthetic and only needs to preserve relative ordering.
+    """
+    model_id, backend_id = deployment_id.split("/", 1)
+
+    ttft_mult = _BACKEND_TTFT_MULT.get(backend_id, 1.2)
+    decode_mult = _BACKEND_DECODE_MULT.get(backend_id, 0.92)
 
     # One intentionally "down-ish" pool baseline.
     if deployment_id == "llama-70b/neocloud":
         return {"ttft_ms": 9999.0, "decode_tps": 0.1}
 
     return {
-        "ttft_ms": float(model_ttft_ms.get(model_id, 170.0) * ttft_mult),
-        "decode_tps": max(5.0, float(model_decode_tps.get(model_id, 60.0) * decode_mult)),
+        "ttft_ms": float(_MODEL_TTFT_MS.get(model_id, 170.0) * ttft_mult),
+        "decode_tps": max(5.0, float(_MODEL_DECODE_TPS.get(model_id, 60.0) * decode_mult)),
     }
 
 
@@ -341,6 +461,9 @@ def _make_daily_perf_schedule(*, rng: random.Random, deployments: list[dict], da
         ttft_mult = 1.0
         decode_mult = 1.0
         sched: list[dict[str, float]] = []
+        b = _base_perf_for_deployment(dep_id)
+        base_ttft_ms = float(b["ttft_ms"])
+        base_decode_tps = float(b["decode_tps"])
 
         for day in range(days):
             # Small daily random walk (bounded).
@@ -356,11 +479,10 @@ def _make_daily_perf_schedule(*, rng: random.Random, deployments: list[dict], da
                 ttft_mult = min(1.8, max(0.6, ttft_mult))
                 decode_mult = min(1.8, max(0.5, decode_mult))
 
-            b = _base_perf_for_deployment(dep_id)
             sched.append(
                 {
-                    "ttft_ms": float(b["ttft_ms"]) * float(ttft_mult),
-                    "decode_tps": max(0.1, float(b["decode_tps"]) * float(decode_mult)),
+                    "ttft_ms": base_ttft_ms * float(ttft_mult),
+                    "decode_tps": max(0.1, base_decode_tps * float(decode_mult)),
                     "ttft_mult": float(ttft_mult),
                     "decode_mult": float(decode_mult),
                     "day_index": int(day),
@@ -436,78 +558,166 @@ def _make_incidents(*, rng: random.Random, window_start: datetime, window_end: d
     return incidents
 
 
-def _parse_rfc3339_z(ts: str) -> datetime:
-    return datetime.fromisoformat(ts.replace("Z", "+00:00")).astimezone(timezone.utc)
+def _epoch_from_rfc3339_z(ts: str) -> int:
+    return int(datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp())
+
+
+class _IncidentRec(NamedTuple):
+    """An incident's active range (integer epoch seconds) with its title-derived effects pre-folded."""
+
+    start_ts: int
+    end_ts: int  # _UNRESOLVED_END_TS while unresolved
+    error_add: float
+    timeout_add: float
+    ttft_mult: float
+    decode_mult: float
+
+
+class _IncidentTarget(NamedTuple):
+    """Incidents that can affect one (deployment, model, backend), sorted by start_ts."""
+
+    starts: list[int]
+    recs: list[_IncidentRec]
+    # hour (epoch_s // 3600) -> effects for every second of that hour, or None when an
+    # incident starts/ends inside it (resolved per second). Filled lazily.
+    hourly: dict[int, tuple[float, float, float, float] | None]
+
+
+class _IncidentIndex(NamedTuple):
+    """Incidents bucketed by target so a lookup only scans incidents that can match."""
+
+    by_deployment: dict[str, list[_IncidentRec]]
+    by_model: dict[str, list[_IncidentRec]]
+    by_backend: dict[str, list[_IncidentRec]]
+    # (deployment_id, model_id, backend_id) -> merged incidents; filled lazily.
+    by_target: dict[tuple[str, str, str], _IncidentTarget]
+
+
+# (error_add, timeout_add, ttft_mult, decode_mult) when no incident applies.
+_NO_INCIDENT_EFFECTS = (0.0, 0.0, 1.0, 1.0)
+_NO_INCIDENTS: list[_IncidentRec] = []
+# End of an incident that is still active; keeps range checks int-only.
+_UNRESOLVED_END_TS = 2**62
+_HOUR_NOT_CACHED = object()
+
+
+def _incident_rec(inc: dict) -> _IncidentRec:
+    """
+    Translate one incident into deterministic perturbations.
+
+    Additive error/timeout deltas and multiplicative TTFT/decode factors.
+    """
+    title = (inc.get("title") or "").lower()
+
+    # Default: incidents make things worse.
+    err_add = 0.03
+    timeout_add = 0.02
+    ttft_mult = 1.15
+    decode_mult = 0.90
+
+    # Latency-focused incident (TTFT regression).
+    if "ttft" in title or "cold start" in title:
+        ttft_mult *= 1.35
+        decode_mult *= 0.97
+
+    # Rate limiting causes more timeouts/errors but not necessarily slower decode.
+    if "rate limit" in title:
+        err_add += 0.05
+        timeout_add += 0.05
+        ttft_mult *= 1.05
+
+    # Spot scarcity / queueing impacts TTFT and timeouts heavily.
+    if "spot" in title or "queue" in title:
+        timeout_add += 0.05
+        ttft_mult *= 1.25
+        decode_mult *= 0.85
+
+    # Intermittent 5xx: mostly errors.
+    if "5xx" in title:
+        err_add += 0.07
+        timeout_add += 0.01
+
+    resolved_at = inc.get("resolved_at")
+    return _IncidentRec(
+        start_ts=_epoch_from_rfc3339_z(inc["started_at"]),
+        end_ts=_epoch_from_rfc3339_z(resolved_at) if resolved_at else _UNRESOLVED_END_TS,
+        error_add=err_add,
+        timeout_add=timeout_add,
+        ttft_mult=ttft_mult,
+        decode_mult=decode_mult,
+    )
+
+
+def _index_incidents(incidents: list[dict]) -> _IncidentIndex:
+    """Parse/fold every incident once, bucketed by (target_type, target_id)."""
+    index = _IncidentIndex(by_deployment={}, by_model={}, by_backend={}, by_target={})
+    buckets = {"deployment": index.by_deployment, "model": index.by_model, "backend": index.by_backend}
+    for inc in incidents:
+        buckets[inc["target_type"]].setdefault(inc["target_id"], []).append(_incident_rec(inc))
+    return index
 
 
 def _incident_effects_for_request(
     *,
-    created_at: datetime,
+    created_ts: int,
     deployment_id: str,
     model_id: str,
     backend_id: str,
-    incidents: list[dict],
-) -> dict[str, float]:
+    incident_index: _IncidentIndex,
+) -> tuple[float, float, float, float]:
     """
-    Translate incidents into deterministic perturbations.
+    Combined incident perturbations active at `created_ts` (integer epoch seconds).
 
-    Returns additive error/timeout deltas and multiplicative TTFT/decode factors.
+    Returns (error_add, timeout_add, ttft_mult, decode_mult).
     """
+    key = (deployment_id, model_id, backend_id)
+    target = incident_index.by_target.get(key)
+    if target is None:
+        recs = sorted(
+            incident_index.by_deployment.get(deployment_id, _NO_INCIDENTS)
+            + incident_index.by_model.get(model_id, _NO_INCIDENTS)
+            + incident_index.by_backend.get(backend_id, _NO_INCIDENTS),
+            key=lambda rec: rec.start_ts,
+        )
+        target = incident_index.by_target[key] = _IncidentTarget([rec.start_ts for rec in recs], recs, {})
+
+    # Most requests fall in hours with no incident boundary: one dict lookup per target-hour.
+    hour = created_ts // 3600
+    effects = target.hourly.get(hour, _HOUR_NOT_CACHED)
+    if effects is _HOUR_NOT_CACHED:
+        effects = target.hourly[hour] = _incident_effects_for_hour(target, hour)
+    if effects is None:
+        return _incident_effects_at(target, created_ts)
+    return effects
+
+
+def _incident_effects_for_hour(target: _IncidentTarget, hour: int) -> tuple[float, float, float, float] | None:
+    """Effects shared by every second of `hour`, or None if the active incident set changes inside it."""
+    h0 = hour * 3600
+    h1 = h0 + 3599
+    for rec in target.recs:
+        if h0 < rec.start_ts <= h1 or h0 <= rec.end_ts < h1:
+            return None
+    return _incident_effects_at(target, h0)
+
+
+def _incident_effects_at(target: _IncidentTarget, created_ts: int) -> tuple[float, float, float, float]:
+    # Only incidents that have started by created_ts can apply.
+    n = bisect_right(target.starts, created_ts)
+    if not n:
+        return _NO_INCIDENT_EFFECTS
+
     err_add = 0.0
     timeout_add = 0.0
     ttft_mult = 1.0
     decode_mult = 1.0
-
-    for inc in incidents:
-        started = _parse_rfc3339_z(inc["started_at"])
-        resolved_at = inc.get("resolved_at")
-        ended = _parse_rfc3339_z(resolved_at) if resolved_at else None
-        if created_at < started:
-            continue
-        if ended is not None and created_at > ended:
-            continue
-
-        target_type = inc["target_type"]
-        target_id = inc["target_id"]
-        match = (
-            (target_type == "deployment" and target_id == deployment_id)
-            or (target_type == "model" and target_id == model_id)
-            or (target_type == "backend" and target_id == backend_id)
-        )
-        if not match:
-            continue
-
-        title = (inc.get("title") or "").lower()
-
-        # Default: incidents make things worse.
-        err_add += 0.03
-        timeout_add += 0.02
-        ttft_mult *= 1.15
-        decode_mult *= 0.90
-
-        # Latency-focused incident (TTFT regression).
-        if "ttft" in title or "cold start" in title:
-            ttft_mult *= 1.35
-            decode_mult *= 0.97
-
-        # Rate limiting causes more timeouts/errors but not necessarily slower decode.
-        if "rate limit" in title:
-            err_add += 0.05
-            timeout_add += 0.05
-            ttft_mult *= 1.05
-
-        # Spot scarcity / queueing impacts TTFT and timeouts heavily.
-        if "spot" in title or "queue" in title:
-            timeout_add += 0.05
-            ttft_mult *= 1.25
-            decode_mult *= 0.85
-
-        # Intermittent 5xx: mostly errors.
-        if "5xx" in title:
-            err_add += 0.07
-            timeout_add += 0.01
-
-    return {"error_add": err_add, "timeout_add": timeout_add, "ttft_mult": ttft_mult, "decode_mult": decode_mult}
+    for rec in islice(target.recs, n):
+        if created_ts <= rec.end_ts:
+            err_add += rec.error_add
+            timeout_add += rec.timeout_add
+            ttft_mult *= rec.ttft_mult
+            decode_mult *= rec.decode_mult
+    return (err_add, timeout_add, ttft_mult, decode_mult)
 
 
 def _weighted_choice(rng: random.Random, items: list[tuple[str, float]]) -> str:
@@ -527,18 +737,30 @@ def _weighted_choice(rng: random.Random, items: list[tuple[str, float]]) -> str:
     return items[-1][0]
 
 
+def _weighted_choice3(rng: random.Random, v0: str, w0: float, v1: str, w1: float, v2: str, w2: float) -> str:
+    """_weighted_choice specialized to three positive weights (the usual tier preference length)."""
+    r = rng.random() * (w0 + w1 + w2)
+    if r <= w0:
+        return v0
+    if r <= w0 + w1:
+        return v1
+    return v2
+
+
 def _choose_deployment_for_request(
     *,
     rng: random.Random,
     tier_id: str,
-    created_at: datetime,
-    preferred: list[str],
-    incidents: list[dict],
-    enabled_ids: set[str],
+    created_ts: int,
+    candidates: list[tuple[str, bool]],
+    incident_index: _IncidentIndex,
+    model_backend: dict[str, tuple[str, str]],
 ) -> str:
     """
     Choose a deployment, reacting to incidents by reducing probability of affected targets.
     Still allows minor mistakes by sometimes ignoring incident penalties.
+
+    `candidates` is the tier's preference order as (deployment_id, enabled) pairs.
     """
     # Base preference weights by rank.
     base_rank_weights = [1.0, 0.6, 0.3]
@@ -551,20 +773,25 @@ def _choose_deployment_for_request(
 
     # Occasionally make a "mistake": ignore incident penalties and pick mostly by tier preference.
     if rng.random() < 0.04:
-        return _weighted_choice(rng, [(dep, base_rank_weights[min(i, len(base_rank_weights) - 1)]) for i, dep in enumerate(preferred)])
+        if len(candidates) == 3:
+            (v0, _), (v1, _), (v2, _) = candidates
+            return _weighted_choice3(rng, v0, base_rank_weights[0], v1, base_rank_weights[1], v2, base_rank_weights[2])
+        return _weighted_choice(
+            rng, [(dep, base_rank_weights[min(i, len(base_rank_weights) - 1)]) for i, (dep, _) in enumerate(candidates)]
+        )
 
     weighted: list[tuple[str, float]] = []
-    for i, dep in enumerate(preferred):
+    for i, (dep, enabled) in enumerate(candidates):
         w = base_rank_weights[min(i, len(base_rank_weights) - 1)]
-        model_id, backend_id = dep.split("/", 1)
-        eff = _incident_effects_for_request(
-            created_at=created_at,
+        model_id, backend_id = model_backend[dep]
+        err_add, timeout_add, ttft_mult, decode_mult = _incident_effects_for_request(
+            created_ts=created_ts,
             deployment_id=dep,
             model_id=model_id,
             backend_id=backend_id,
-            incidents=incidents,
+            incident_index=incident_index,
         )
-        pressure = float(eff["error_add"]) + float(eff["timeout_add"])
+        pressure = err_add + timeout_add
 
         # Penalize deployments with incident pressure (deployment/model/backend scoped incidents).
         # Keep a non-zero floor to allow mistakes / lingering traffic.
@@ -572,17 +799,20 @@ def _choose_deployment_for_request(
         w *= incident_penalty
 
         # Penalize disabled deployments heavily, but do not fully eliminate (minor mistakes).
-        if dep not in enabled_ids:
+        if not enabled:
             w *= 0.08
 
         # If incident makes TTFT much worse or decode much worse, apply an extra penalty.
-        if float(eff["ttft_mult"]) >= 1.35:
+        if ttft_mult >= 1.35:
             w *= 0.75
-        if float(eff["decode_mult"]) <= 0.85:
+        if decode_mult <= 0.85:
             w *= 0.75
 
         weighted.append((dep, max(0.01, float(w))))
 
+    if len(weighted) == 3:
+        (v0, w0), (v1, w1), (v2, w2) = weighted
+        return _weighted_choice3(rng, v0, w0, v1, w1, v2, w2)
     return _weighted_choice(rng, weighted)
 
 
@@ -595,9 +825,9 @@ def _insert_tiers(conn: sqlite3.Connection, rows: list[dict]) -> None:
     conn.executemany(
         """
         INSERT INTO tiers (id, latency_sla_p95_ms, sla_window_sec, max_error_rate, max_timeout_rate)
-        VALUES (:id, :latency_sla_p95_ms, :sla_window_sec, :max_error_rate, :max_timeout_rate)
+        VALUES (?, ?, ?, ?, ?)
         """,
-        rows,
+        map(itemgetter("id", "latency_sla_p95_ms", "sla_window_sec", "max_error_rate", "max_timeout_rate"), rows),
     )
 
 
@@ -605,9 +835,12 @@ def _insert_models(conn: sqlite3.Connection, rows: list[dict]) -> None:
     conn.executemany(
         """
         INSERT INTO models (id, provider, max_context_tokens, supports_streaming, supports_tools, supports_json_mode, notes)
-        VALUES (:id, :provider, :max_context_tokens, :supports_streaming, :supports_tools, :supports_json_mode, :notes)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
         """,
-        rows,
+        map(
+            itemgetter("id", "provider", "max_context_tokens", "supports_streaming", "supports_tools", "supports_json_mode", "notes"),
+            rows,
+        ),
     )
 
 
@@ -615,9 +848,9 @@ def _insert_backends(conn: sqlite3.Connection, rows: list[dict]) -> None:
     conn.executemany(
         """
         INSERT INTO backends (id, provider, region, backend_type, notes)
-        VALUES (:id, :provider, :region, :backend_type, :notes)
+        VALUES (?, ?, ?, ?, ?)
         """,
-        rows,
+        map(itemgetter("id", "provider", "region", "backend_type", "notes"), rows),
     )
 
 
@@ -625,9 +858,9 @@ def _insert_deployments(conn: sqlite3.Connection, rows: list[dict]) -> None:
     conn.executemany(
         """
         INSERT INTO deployments (id, model_id, backend_id, enabled, weight, created_at)
-        VALUES (:id, :model_id, :backend_id, :enabled, :weight, :created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
         """,
-        rows,
+        map(itemgetter("id", "model_id", "backend_id", "enabled", "weight", "created_at"), rows),
     )
 
 
@@ -640,13 +873,32 @@ def _insert_deployment_state_current(conn: sqlite3.Connection, rows: list[dict])
           queue_depth, rate_limit_remaining,
           ttft_p50_ms, ttft_p95_ms, decode_toks_per_sec_p50, decode_toks_per_sec_p95
         ) VALUES (
-          :deployment_id, :status, :window_sec, :sample_count, :updated_at,
-          :latency_p50_ms, :latency_p95_ms, :error_rate, :timeout_rate,
-          :queue_depth, :rate_limit_remaining,
-          :ttft_p50_ms, :ttft_p95_ms, :decode_toks_per_sec_p50, :decode_toks_per_sec_p95
+          ?, ?, ?, ?, ?,
+          ?, ?, ?, ?,
+          ?, ?,
+          ?, ?, ?, ?
         )
         """,
-        rows,
+        map(
+            itemgetter(
+                "deployment_id",
+                "status",
+                "window_sec",
+                "sample_count",
+                "updated_at",
+                "latency_p50_ms",
+                "latency_p95_ms",
+                "error_rate",
+                "timeout_rate",
+                "queue_depth",
+                "rate_limit_remaining",
+                "ttft_p50_ms",
+                "ttft_p95_ms",
+                "decode_toks_per_sec_p50",
+                "decode_toks_per_sec_p95",
+            ),
+            rows,
+        ),
     )
 
 
@@ -659,12 +911,12 @@ def _insert_users(conn: sqlite3.Connection, rows: list[dict]) -> None:
           latency_sla_p95_ms_override, max_error_rate_override, max_timeout_rate_override,
           preferences_json
         ) VALUES (
-          :id, :tier_id, :daily_budget_usd,
+          ?, ?, ?,
           NULL, NULL, NULL,
           NULL
         )
         """,
-        rows,
+        map(itemgetter("id", "tier_id", "daily_budget_usd"), rows),
     )
 
 
@@ -672,40 +924,20 @@ def _insert_incidents(conn: sqlite3.Connection, rows: list[dict]) -> None:
     conn.executemany(
         """
         INSERT INTO incidents (id, target_type, target_id, title, status, started_at, resolved_at)
-        VALUES (:id, :target_type, :target_id, :title, :status, :started_at, :resolved_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
         """,
-        rows,
+        map(itemgetter("id", "target_type", "target_id", "title", "status", "started_at", "resolved_at"), rows),
     )
 
 
-def _insert_requests(conn: sqlite3.Connection, rows: list[dict]) -> None:
-    conn.executemany(
-        """
-        INSERT INTO requests (
-          id, created_at, user_id, deployment_id,
-          model_id, backend_id,
-          task_type, input_tokens, output_tokens,
-          latency_ms, ttft_ms, decode_toks_per_sec,
-          cost_usd, status, error_code,
-          router_version, experiment_id, routing_reason_json
-        ) VALUES (
-          :id, :created_at, :user_id, :deployment_id,
-          :model_id, :backend_id,
-          :task_type, :input_tokens, :output_tokens,
-          :latency_ms, :ttft_ms, :decode_toks_per_sec,
-          :cost_usd, :status, :error_code,
-          :router_version, :experiment_id, :routing_reason_json
-        )
-        """,
-        rows,
-    )
+def _insert_requests(conn: sqlite3.Connection, rows: Iterable[tuple]) -> None:
+    # Rows are tuples in _REQUEST_COLUMNS order.
+    conn.executemany(_SQL_INSERT_REQUESTS, rows)
 
 
-def _insert_quality_scores(conn: sqlite3.Connection, rows: list[dict]) -> None:
-    conn.executemany(
-        "INSERT INTO quality_scores (request_id, eval_type, score, evaluated_at) VALUES (:request_id, :eval_type, :score, :evaluated_at)",
-        rows,
-    )
+def _insert_quality_scores(conn: sqlite3.Connection, rows: Iterable[tuple]) -> None:
+    # Rows are (request_id, eval_type, score, evaluated_at) tuples.
+    conn.executemany(_SQL_INSERT_QUALITY_SCORES, rows)
 
 
 # -----------------------------
@@ -719,15 +951,9 @@ def _deployment_pricing_per_1k_tokens() -> dict[str, float]:
     return {}
 
 
-def _price_per_1k_tokens(deployment_id: str) -> float:
-    """
-    Synthetic pricing model ($ per 1k total tokens).
-    We intentionally do not store this in the schema; it is used to populate requests.cost_usd.
-    """
-    model_id, backend_id = deployment_id.split("/", 1)
-
-    # Base model prices (rough ordering; not real-world accurate).
-    model_price: dict[str, float] = {
+# Base model prices (rough ordering; not real-world accurate).
+_MODEL_PRICE: Mapping[str, float] = MappingProxyType(
+    {
         "gpt-4": 0.030,
         "gpt-4-mini": 0.010,
         "gpt-3.5": 0.004,
@@ -739,11 +965,19 @@ def _price_per_1k_tokens(deployment_id: str) -> float:
         "mistral-large": 0.007,
         "mixtral-8x7b": 0.005,
     }
+)
 
-    # Backend multipliers: managed APIs more expensive than self-hosted.
-    backend_mult: dict[str, float] = {"aws": 1.0, "k8s": 0.75, "neocloud": 0.65}
+# Backend multipliers: managed APIs more expensive than self-hosted.
+_BACKEND_PRICE_MULT: Mapping[str, float] = MappingProxyType({"aws": 1.0, "k8s": 0.75, "neocloud": 0.65})
 
-    return float(model_price.get(model_id, 0.008) * backend_mult.get(backend_id, 0.8))
+
+def _price_per_1k_tokens(deployment_id: str) -> float:
+    """
+    Synthetic pricing model ($ per 1k total tokens).
+    We intentionally do not store this in the schema; it is used to populate requests.cost_usd.
+    """
+    model_id, backend_id = deployment_id.split("/", 1)
+    return float(_MODEL_PRICE.get(model_id, 0.008) * _BACKEND_PRICE_MULT.get(backend_id, 0.8))
 
 
 def _tier_preferred_deployments(tier_id: str) -> list[str]:
@@ -755,17 +989,58 @@ def _tier_preferred_deployments(tier_id: str) -> list[str]:
     return ["llama-13b/k8s", "mixtral-8x7b/k8s", "gpt-3.5/k8s", "claude-3-haiku/k8s"]
 
 
-def _router_version_for(ts: datetime, *, window_start: datetime, window_end: datetime) -> str:
-    midpoint = window_start + (window_end - window_start) / 2
-    return "v1.1.0" if ts < midpoint else "v1.2.0"
+def _router_version_midpoint_ts(*, window_start_ts: int, window_end_ts: int) -> int:
+    """First whole second served by v1.2.0 (the rollout happens halfway through the window)."""
+    return window_start_ts + (window_end_ts - window_start_ts + 1) // 2
 
 
-def _experiment_id_for(rng: random.Random, ts: datetime, *, window_end: datetime) -> str | None:
-    if ts >= (window_end - timedelta(days=3)) and rng.random() < 0.25:
+def _experiment_id_for(rng: random.Random, ts: int, *, window_end_ts: int) -> str | None:
+    if ts >= (window_end_ts - 3 * 86400) and rng.random() < 0.25:
         return "exp_latency_tuning"
     return None
 
 
+# Lookup pieces for _rfc3339_z_from_ts: "HH:MM:" per minute of the day, "SSZ" per second.
+_HH_MM = tuple(f"{h:02d}:{m:02d}:" for h in range(24) for m in range(60))
+_SS_Z = tuple(f"{sec:02d}Z" for sec in range(60))
+_DAY_PREFIXES: dict[int, str] = {}
+
+
+def _rfc3339_z_from_ts(ts: int) -> str:
+    # Same output as to_rfc3339_z, without building a datetime: the "YYYY-MM-DDT" prefix is
+    # formatted once per day, the time of day is two table lookups.
+    day, sec_of_day = divmod(ts, 86400)
+    prefix = _DAY_PREFIXES.get(day)
+    if prefix is None:
+        prefix = _DAY_PREFIXES[day] = time.strftime("%Y-%m-%dT", time.gmtime(day * 86400))
+    minute, sec = divmod(sec_of_day, 60)
+    return prefix + _HH_MM[minute] + _SS_Z[sec]
+
+
+_DEFAULT_DAILY_PERF = [(200.0, 45.0)]
+
+
+def _triangular_sampler(rand: Callable[[], float], low: float, high: float, mode: float) -> Callable[[], float]:
+    """
+    random.Random.triangular(low, high, mode) with its constants folded once.
+
+    Consumes one `rand()` per draw and returns bit-identical values, so swapping it in
+    keeps seeded output unchanged.
+    """
+    c = (mode - low) / (high - low)
+    rest = 1.0 - c
+    span = high - low
+    back_span = low - high
+
+    def draw() -> float:
+        u = rand()
+        if u > c:
+            return high + back_span * sqrt((1.0 - u) * rest)
+        return low + span * sqrt(u * c)
+
+    return draw
+
+
 def _generate_requests(
     *,
     rng: random.Random,
@@ -774,15 +1049,39 @@ def _generate_requests(
     window_start: datetime,
     window_end: datetime,
     requests_per_user_per_day: int,
-    incidents: list[dict],
+    incident_index: _IncidentIndex,
     perf_schedule: dict[str, list[dict[str, float]]],
-) -> Iterator[dict]:
+    price_per_1k: dict[str, float],
+) -> Iterator[tuple[int, tuple]]:
+    """Yield (created_ts, row) per request; row is a positional tuple in _REQUEST_COLUMNS order."""
     enabled_ids = {d["id"] for d in deployments if int(d.get("enabled", 1)) == 1}
-    task_types = ["summarization", "coding", "chat", "reasoning"]
+    task_types = [sys.intern(t) for t in ("summarization", "coding", "chat", "reasoning")]
     dep_ids = {d["id"] for d in deployments}
-
-    total_days = max(int((window_end - window_start).total_seconds() // 86400), 1)
+    # Every row for a deployment shares one interned (model_id, backend_id) pair; no per-row split.
+    model_backend = {d["id"]: (sys.intern(d["model_id"]), sys.intern(d["backend_id"])) for d in deployments}
+
+    # Per-row time math runs on epoch seconds; no datetime objects in the hot loop.
+    # created_ts is truncated to whole seconds, matching the stored created_at.
+    window_start_ts = int(window_start.timestamp())
+    window_end_ts = int(window_end.timestamp())
+    window_span_sec = window_end_ts - window_start_ts
+    total_days = max(int(window_span_sec // 86400), 1)
     per_user_total = requests_per_user_per_day * total_days
+    router_mid_ts = _router_version_midpoint_ts(window_start_ts=window_start_ts, window_end_ts=window_end_ts)
+    routing_reason_cache: dict[tuple[str, str], str] = {}
+    # (ttft_ms, decode_tps) per deployment per day, unpacked from the schedule dicts once.
+    daily_perf = {
+        dep_id: [(float(day["ttft_ms"]), float(day["decode_tps"])) for day in sched] for dep_id, sched in perf_schedule.items()
+    }
+
+    # Bound rng methods: skips the attribute lookup on each of the ~15 draws per row.
+    # Draw order is unchanged, so output stays identical for a given rng_seed.
+    random_ = rng.random
+    gauss = rng.gauss
+    choice = rng.choice
+    input_tokens_draw = _triangular_sampler(random_, 200, 3000, 1200)
+    output_tokens_draw = _triangular_sampler(random_, 50, 1200, 300)
+    timeout_latency_draw = _triangular_sampler(random_, 1200, 4000, 2200)
 
     # Deterministic iteration order: users list order, then sequential id per user.
     for user in users:
@@ -792,11 +1091,13 @@ def _generate_requests(
         if not preferred:
             # Fallback: any enabled deployment for this tier.
             preferred = sorted(enabled_ids)[:3]
+        candidates = [(d, d in enabled_ids) for d in preferred]
 
         for j in range(per_user_total):
-            frac = (j + rng.random()) / max(per_user_total, 1)
-            created_at_dt = window_start + (window_end - window_start) * frac
-            day_index = int((created_at_dt - window_start).total_seconds() // 86400)
+            frac = (j + random_()) / max(per_user_total, 1)
+            offset_sec = window_span_sec * frac
+            created_ts = int(window_start_ts + offset_sec)
+            day_index = int(offset_sec // 86400)
             if day_index < 0:
                 day_index = 0
             if day_index >= total_days:
@@ -806,36 +1107,45 @@ def _generate_requests(
             deployment_id = _choose_deployment_for_request(
                 rng=rng,
                 tier_id=tier_id,
-                created_at=created_at_dt,
-                preferred=preferred,
-                incidents=incidents,
-                enabled_ids=enabled_ids,
+                created_ts=created_ts,
+                candidates=candidates,
+                incident_index=incident_index,
+                model_backend=model_backend,
             )
 
-            input_tokens = int(rng.triangular(200, 3000, 1200))
-            output_tokens = int(rng.triangular(50, 1200, 300))
-            task_type = rng.choice(task_types)
+            input_tokens = int(input_tokens_draw())
+            output_tokens = int(output_tokens_draw())
+            task_type = choice(task_types)
 
-            model_id, backend_id = deployment_id.split("/", 1)
+            model_id, backend_id = model_backend[deployment_id]
 
-            # Failure rates (deployment baseline + incident overlays)
+            # Failure rates (deployment baseline + incident overlays), clamped to [0, 0.95].
+            # Clamps below are inline compares rather than min()/max() calls (same values).
             base_error = 0.02
             base_timeout = 0.01
             if deployment_id == "gpt-4/k8s":
                 base_error = 0.05
                 base_timeout = 0.03
 
-            eff = _incident_effects_for_request(
-                created_at=created_at_dt,
+            err_add, timeout_add, inc_ttft_mult, inc_decode_mult = _incident_effects_for_request(
+                created_ts=created_ts,
                 deployment_id=deployment_id,
                 model_id=model_id,
                 backend_id=backend_id,
-                incidents=incidents,
+                incident_index=incident_index,
             )
-            base_error = min(0.95, max(0.0, base_error + float(eff["error_add"])))
-            base_timeout = min(0.95, max(0.0, base_timeout + float(eff["timeout_add"])))
-
-            roll = rng.random()
+            base_error += err_add
+            if base_error > 0.95:
+                base_error = 0.95
+            elif base_error < 0.0:
+                base_error = 0.0
+            base_timeout += timeout_add
+            if base_timeout > 0.95:
+                base_timeout = 0.95
+            elif base_timeout < 0.0:
+                base_timeout = 0.0
+
+            roll = random_()
             if roll < base_timeout:
                 status = "timeout"
             elif roll < (base_timeout + base_error):
@@ -844,108 +1154,165 @@ def _generate_requests(
                 status = "success"
 
             # Latency primitives with daily drift (once per day) plus incident overlays.
-            daily = perf_schedule.get(deployment_id, [{"ttft_ms": 200.0, "decode_tps": 45.0}])[day_index]
-            ttft_base = float(daily["ttft_ms"]) * float(eff["ttft_mult"])
-            decode_base = float(daily["decode_tps"]) * float(eff["decode_mult"])
+            ttft_day, decode_day = daily_perf.get(deployment_id, _DEFAULT_DAILY_PERF)[day_index]
+            ttft_base = ttft_day * inc_ttft_mult
+            decode_base = decode_day * inc_decode_mult
 
-            ttft_ms = max(20, int(rng.gauss(ttft_base, ttft_base * 0.25)))
-            decode_tps = max(5.0, float(rng.gauss(decode_base, decode_base * 0.20)))
+            ttft_ms = int(gauss(ttft_base, ttft_base * 0.25))
+            if ttft_ms < 20:
+                ttft_ms = 20
+            decode_tps = gauss(decode_base, decode_base * 0.20)
+            if decode_tps < 5.0:
+                decode_tps = 5.0
 
             if status == "timeout":
-                latency_ms = int(rng.triangular(1200, 4000, 2200))
+                latency_ms = int(timeout_latency_draw())
             else:
                 decode_ms = int((output_tokens / decode_tps) * 1000.0)
-                noise = int(rng.gauss(0, 60))
-                latency_ms = max(30, ttft_ms + decode_ms + noise)
+                noise = int(gauss(0, 60))
+                latency_ms = ttft_ms + decode_ms + noise
+                if latency_ms < 30:
+                    latency_ms = 30
+
+            router_version = "v1.1.0" if created_ts < router_mid_ts else "v1.2.0"
+            experiment_id = _experiment_id_for(rng, created_ts, window_end_ts=window_end_ts)
+
+            cost_usd = round(((input_tokens + output_tokens) / 1000.0) * price_per_1k[deployment_id], 6)
+
+            # The reason depends only on (tier, chosen deployment): encode each shape once.
+            reason_key = (tier_id, deployment_id)
+            routing_reason_json = routing_reason_cache.get(reason_key)
+            if routing_reason_json is None:
+                routing_reason = {
+                    "tier_id": tier_id,
+                    "options_considered": [
+                        {"deployment": preferred[0], "available": preferred[0] in dep_ids},
+                        {"deployment": preferred[-1], "available": preferred[-1] in dep_ids},
+                    ],
+                    "decision": f"{deployment_id}: tier preference and health constraints",
+                }
+                routing_reason_json = routing_reason_cache[reason_key] = json.dumps(routing_reason)
+
+            # Positional tuple in _REQUEST_COLUMNS order.
+            req = (
+                f"req_{user['id']}_{j:06d}",
+                _rfc3339_z_from_ts(created_ts),
+                user["id"],
+                deployment_id,
+                model_id,
+                backend_id,
+                task_type,
+                input_tokens,
+                output_tokens,
+                latency_ms,
+                ttft_ms,
+                round(decode_tps, 3),
+                cost_usd,
+                status,
+                None,
+                router_version,
+                experiment_id,
+                routing_reason_json,
+            )
 
-            router_version = _router_version_for(created_at_dt, window_start=window_start, window_end=window_end)
-            experiment_id = _experiment_id_for(rng, created_at_dt, window_end=window_end)
+            yield created_ts, req
 
-            cost_usd = round(((input_tokens + output_tokens) / 1000.0) * _price_per_1k_tokens(deployment_id), 6)
 
-            routing_reason = {
-                "tier_id": tier_id,
-                "options_considered": [
-                    {"deployment": preferred[0], "available": preferred[0] in dep_ids},
-                    {"deployment": preferred[-1], "available": preferred[-1] in dep_ids},
-                ],
-                "decision": f"{deployment_id}: tier preference and health constraints",
-            }
+def _generate_user_rows(cfg: SeedConfig, user: dict, gen_kwargs: dict) -> tuple[list[tuple], list[tuple]]:
+    """One user's request and quality rows, from an rng derived from (rng_seed, user id)."""
+    rng = random.Random(f"{cfg.rng_seed}:{user['id']}")
+    generated = list(_generate_requests(rng=rng, users=[user], **gen_kwargs))
+    base_now_ts = int(cfg.base_now.timestamp())
+    quality_rows = [
+        _make_quality_row(
+            rng=rng, req=req, created_ts=created_ts, base_now_ts=base_now_ts, incident_index=gen_kwargs["incident_index"]
+        )
+        for created_ts, req in generated
+        if rng.random() <= cfg.quality_coverage
+    ]
+    return [req for _, req in generated], quality_rows
+
+
+def _generate_user_slice_rows(
+    cfg: SeedConfig, users: list[dict], gen_kwargs: dict
+) -> list[tuple[list[tuple], list[tuple]]]:
+    """Process-pool worker (cfg.workers > 1): _generate_user_rows for each user in the slice, in order."""
+    return [_generate_user_rows(cfg, user, gen_kwargs) for user in users]
+
+
+def _make_quality_row(
+    *, rng: random.Random, req: tuple, created_ts: int, base_now_ts: int, incident_index: _IncidentIndex
+) -> tuple:
+    # created_ts is the generator's epoch value for req's created_at (no re-parse); the only
+    # string built is the evaluated_at column itself.
+    evaluated_ts = created_ts + 3600 * int(rng.triangular(1, 8, 3))
+    if evaluated_ts > base_now_ts + 3600:
+        evaluated_ts = base_now_ts + 60 * int(rng.triangular(5, 55, 20))
+
+    err_add, timeout_add, _, _ = _incident_effects_for_request(
+        created_ts=created_ts,
+        deployment_id=req[_REQ_DEPLOYMENT_ID],
+        model_id=req[_REQ_MODEL_ID],
+        backend_id=req[_REQ_BACKEND_ID],
+        incident_index=incident_index,
+    )
+    in_incident = (err_add + timeout_add) > 0.0
+    score = rng.triangular(0.35, 0.75, 0.55) if in_incident else rng.triangular(0.70, 0.98, 0.88)
+    # (request_id, eval_type, score, evaluated_at)
+    return (req[_REQ_ID], "offline", round(score, 4), _rfc3339_z_from_ts(evaluated_ts))
 
-            req = {
-                "id": f"req_{user['id']}_{j:06d}",
-                "created_at": to_rfc3339_z(created_at_dt),
-                "user_id": user["id"],
-                "deployment_id": deployment_id,
-                "model_id": model_id,
-                "backend_id": backend_id,
-                "task_type": task_type,
-                "input_tokens": input_tokens,
-                "output_tokens": output_tokens,
-                "latency_ms": latency_ms,
-                "ttft_ms": ttft_ms,
-                "decode_toks_per_sec": round(float(decode_tps), 3),
-                "cost_usd": cost_usd,
-                "status": status,
-                "error_code": None,
-                "router_version": router_version,
-                "experiment_id": experiment_id,
-                "routing_reason_json": json.dumps(routing_reason),
-            }
 
-            yield req
+def _p50_p95(vals: list, cast: Callable[[object], object]) -> tuple:
+    """
+    Lower-index (nearest-rank) p50 and p95 of `vals`, cast with `cast`; (None, None) if empty.
 
+    Sorts `vals` in place once for both percentiles.
+    """
+    if not vals:
+        return None, None
+    vals.sort()
+    last = len(vals) - 1
+    return cast(vals[int(0.50 * last)]), cast(vals[int(0.95 * last)])
 
-def _make_quality_row(*, rng: random.Random, req: dict, base_now: datetime, incidents: list[dict]) -> dict:
-    created = datetime.fromisoformat(req["created_at"].replace("Z", "+00:00")).astimezone(timezone.utc)
-    evaluated_at = created + timedelta(hours=int(rng.triangular(1, 8, 3)))
-    if evaluated_at > base_now + timedelta(hours=1):
-        evaluated_at = base_now + timedelta(minutes=int(rng.triangular(5, 55, 20)))
 
-    eff = _incident_effects_for_request(
-        created_at=created,
-        deployment_id=req["deployment_id"],
-        model_id=req["model_id"],
-        backend_id=req["backend_id"],
-        incidents=incidents,
-    )
-    in_incident = (eff["error_add"] + eff["timeout_add"]) > 0.0
-    score = rng.triangular(0.35, 0.75, 0.55) if in_incident else rng.triangular(0.70, 0.98, 0.88)
-    return {
-        "request_id": req["id"],
-        "eval_type": "offline",
-        "score": round(float(score), 4),
-        "evaluated_at": to_rfc3339_z(evaluated_at),
-    }
+class _P50Aggregate:
+    """SQLite aggregate: nearest-rank p50 of the non-NULL inputs (same rank as _p50_p95)."""
 
+    q = 0.50
 
-def _percentile_int(vals: list[int], q: float) -> int | None:
-    if not vals:
-        return None
-    vals_sorted = sorted(vals)
-    if len(vals_sorted) == 1:
-        return int(vals_sorted[0])
-    q = max(0.0, min(1.0, float(q)))
-    idx = int(q * (len(vals_sorted) - 1))
-    return int(vals_sorted[idx])
+    def __init__(self) -> None:
+        self.vals: list = []
 
+    def step(self, value: object) -> None:
+        if value is not None:
+            self.vals.append(value)
 
-def _percentile_float(vals: list[float], q: float) -> float | None:
-    if not vals:
-        return None
-    vals_sorted = sorted(vals)
-    if len(vals_sorted) == 1:
-        return float(vals_sorted[0])
-    q = max(0.0, min(1.0, float(q)))
-    idx = int(q * (len(vals_sorted) - 1))
-    return float(vals_sorted[idx])
+    def finalize(self) -> object:
+        if not self.vals:
+            return None
+        self.vals.sort()
+        return self.vals[int(self.q * (len(self.vals) - 1))]
+
+
+class _P95Aggregate(_P50Aggregate):
+    """SQLite aggregate: nearest-rank p95 of the non-NULL inputs."""
+
+    q = 0.95
+
+
+def _opt_int(v: object) -> int | None:
+    return None if v is None else int(v)
+
+
+def _opt_float(v: object) -> float | None:
+    return None if v is None else float(v)
 
 
 def _compute_deployment_state_from_recent_requests(
     *,
     conn: sqlite3.Connection,
     deployments: list[dict],
-    incidents: list[dict],
+    incident_index: _IncidentIndex,
     window_end: datetime,
     window_sec: int,
 ) -> list[dict]:
@@ -960,71 +1327,61 @@ def _compute_deployment_state_from_recent_requests(
     end_s = to_rfc3339_z(window_end)
     start_s = to_rfc3339_z(window_end - timedelta(seconds=window_sec))
 
-    dep_rows = conn.execute(
+    # One pass over the (created_at, deployment_id) index range: counts and the success-only
+    # percentiles are aggregated inside SQLite, one row per deployment comes back.
+    conn.create_aggregate("seed_p50", 1, _P50Aggregate)
+    conn.create_aggregate("seed_p95", 1, _P95Aggregate)
+    # Plain tuple rows (bypassing the connection's dict factory): columns are unpacked by position.
+    cur = conn.cursor()
+    cur.row_factory = None
+    rows = cur.execute(
         """
-        SELECT deployment_id, status, latency_ms, ttft_ms, decode_toks_per_sec
+        SELECT
+          deployment_id,
+          COUNT(*) AS total,
+          SUM(CASE WHEN status = 'error' THEN 1 ELSE 0 END) AS errors,
+          SUM(CASE WHEN status = 'timeout' THEN 1 ELSE 0 END) AS timeouts,
+          seed_p50(CASE WHEN status = 'success' THEN latency_ms END) AS lat_p50,
+          seed_p95(CASE WHEN status = 'success' THEN latency_ms END) AS lat_p95,
+          seed_p50(CASE WHEN status = 'success' THEN ttft_ms END) AS ttft_p50,
+          seed_p95(CASE WHEN status = 'success' THEN ttft_ms END) AS ttft_p95,
+          seed_p50(CASE WHEN status = 'success' THEN decode_toks_per_sec END) AS dec_p50,
+          seed_p95(CASE WHEN status = 'success' THEN decode_toks_per_sec END) AS dec_p95
         FROM requests
         WHERE created_at >= ? AND created_at <= ?
+        GROUP BY deployment_id
         """,
         (start_s, end_s),
     ).fetchall()
-
-    # Aggregate per deployment
-    agg: dict[str, dict[str, object]] = {}
-    for d in deployments:
-        agg[d["id"]] = {
-            "total": 0,
-            "errors": 0,
-            "timeouts": 0,
-            "lat": [],
-            "ttft": [],
-            "dec": [],
-        }
-
-    for r in dep_rows:
-        dep_id = r["deployment_id"]
-        if dep_id not in agg:
-            continue
-        a = agg[dep_id]
-        a["total"] = int(a["total"]) + 1
-        st = r["status"]
-        if st == "error":
-            a["errors"] = int(a["errors"]) + 1
-        elif st == "timeout":
-            a["timeouts"] = int(a["timeouts"]) + 1
-        elif st == "success":
-            if r["latency_ms"] is not None:
-                a["lat"].append(int(r["latency_ms"]))
-            if r["ttft_ms"] is not None:
-                a["ttft"].append(int(r["ttft_ms"]))
-            if r["decode_toks_per_sec"] is not None:
-                a["dec"].append(float(r["decode_toks_per_sec"]))
+    by_dep = {r[0]: r[1:] for r in rows}
+    # (total, errors, timeouts, lat_p50, lat_p95, ttft_p50, ttft_p95, dec_p50, dec_p95)
+    no_samples = (0, 0, 0, None, None, None, None, None, None)
 
     updated_at = end_s
+    window_end_ts = int(window_end.timestamp())
     out: list[dict] = []
-    for dep_id, a in agg.items():
-        total = int(a["total"])
-        errors = int(a["errors"])
-        timeouts = int(a["timeouts"])
+    for d in deployments:
+        dep_id = d["id"]
+        backend_id = d["backend_id"]
+        # COUNT/SUM come back from SQLite as ints already.
+        total, errors, timeouts, lat_p50, lat_p95, ttft_p50, ttft_p95, dec_p50, dec_p95 = by_dep.get(
+            dep_id, no_samples
+        )
         error_rate = (errors / total) if total else 0.0
         timeout_rate = (timeouts / total) if total else 0.0
 
-        lat: list[int] = a["lat"]
-        ttft: list[int] = a["ttft"]
-        dec: list[float] = a["dec"]
-
         # Status heuristic derived from window + active incidents overlapping window_end.
         status = "healthy"
 
         # If there is an active deployment incident for this deployment at window_end, mark it down.
-        effects_now = _incident_effects_for_request(
-            created_at=window_end,
+        err_now, timeout_now, _, _ = _incident_effects_for_request(
+            created_ts=window_end_ts,
             deployment_id=dep_id,
-            model_id=dep_id.split("/", 1)[0],
-            backend_id=dep_id.split("/", 1)[1],
-            incidents=incidents,
+            model_id=d["model_id"],
+            backend_id=backend_id,
+            incident_index=incident_index,
         )
-        active_pressure = effects_now["error_add"] + effects_now["timeout_add"]
+        active_pressure = err_now + timeout_now
 
         if active_pressure >= 0.15:
             status = "down"
@@ -1036,7 +1393,6 @@ def _compute_deployment_state_from_recent_requests(
 
         # Synthetic infra metrics (queue depth + rate limit remaining).
         # These are intentionally simple and depend on recent load + status.
-        _, backend_id = dep_id.split("/", 1)
         base_queue = {"aws": 12, "k8s": 40, "neocloud": 25}.get(backend_id, 20)
         base_rl = {"aws": 900, "k8s": 2000, "neocloud": 1200}.get(backend_id, 1000)
         queue_depth = None
@@ -1058,21 +1414,35 @@ def _compute_deployment_state_from_recent_requests(
                 "window_sec": window_sec,
                 "sample_count": total,
                 "updated_at": updated_at,
-                "latency_p50_ms": _percentile_int(lat, 0.50),
-                "latency_p95_ms": _percentile_int(lat, 0.95),
+                "latency_p50_ms": _opt_int(lat_p50),
+                "latency_p95_ms": _opt_int(lat_p95),
                 "error_rate": float(round(error_rate, 6)),
                 "timeout_rate": float(round(timeout_rate, 6)),
                 "queue_depth": queue_depth,
                 "rate_limit_remaining": rate_limit_remaining,
-                "ttft_p50_ms": _percentile_int(ttft, 0.50),
-                "ttft_p95_ms": _percentile_int(ttft, 0.95),
-                "decode_toks_per_sec_p50": _percentile_float(dec, 0.50),
-                "decode_toks_per_sec_p95": _percentile_float(dec, 0.95),
+                "ttft_p50_ms": _opt_int(ttft_p50),
+                "ttft_p95_ms": _opt_int(ttft_p95),
+                "decode_toks_per_sec_p50": _opt_float(dec_p50),
+                "decode_toks_per_sec_p95": _opt_float(dec_p95),
             }
         )
     return out
 
 
+@dataclass(slots=True)
+class _DailyBucket:
+    """Per-(day, deployment) report accumulator."""
+
+    total: int = 0
+    success: int = 0
+    error: int = 0
+    timeout: int = 0
+    lat: list[int] = field(default_factory=list)
+    ttft: list[int] = field(default_factory=list)
+    dec: list[float] = field(default_factory=list)
+    cost: float = 0.0
+
+
 class _ReportBuilder:
     def __init__(
         self,
@@ -1099,48 +1469,34 @@ class _ReportBuilder:
         self.quality_count = 0
 
         # daily metrics keyed by (day_iso, deployment_id)
-        self.daily: dict[tuple[str, str], dict[str, object]] = {}
+        self.daily: dict[tuple[str, str], _DailyBucket] = {}
         self.dep_state_current: list[dict] | None = None
 
-    def _get_bucket(self, day_iso: str, dep_id: str) -> dict[str, object]:
-        key = (day_iso, dep_id)
-        if key not in self.daily:
-            self.daily[key] = {
-                "total": 0,
-                "success": 0,
-                "error": 0,
-                "timeout": 0,
-                "lat": [],
-                "ttft": [],
-                "dec": [],
-                "cost": 0.0,
-            }
-        return self.daily[key]
-
-    def add_request(self, req: dict) -> None:
+    def add_request(self, req: tuple) -> None:
+        # Aggregated in-stream from the generated tuple (already typed by _generate_requests):
+        # cheaper than re-scanning the inserted rows with SQL window functions at write() time.
         self.request_count += 1
-        created = datetime.fromisoformat(req["created_at"].replace("Z", "+00:00")).astimezone(timezone.utc)
-        day_iso = created.date().isoformat()
-        dep_id = req["deployment_id"]
-        b = self._get_bucket(day_iso, dep_id)
-        b["total"] = int(b["total"]) + 1
-        st = req["status"]
+        # created_at is UTC RFC3339 ("YYYY-MM-DDTHH:MM:SSZ"), so the day is its date prefix.
+        key = (req[_REQ_CREATED_AT][:10], req[_REQ_DEPLOYMENT_ID])
+        b = self.daily.get(key)
+        if b is None:
+            b = self.daily[key] = _DailyBucket()
+        b.total += 1
+        # _generate_requests always fills latency/ttft/decode/cost (timeouts included), so
+        # only the status decides what is sampled.
+        st = req[_REQ_STATUS]
         if st == "success":
-            b["success"] = int(b["success"]) + 1
-            if req.get("latency_ms") is not None:
-                b["lat"].append(int(req["latency_ms"]))
-            if req.get("ttft_ms") is not None:
-                b["ttft"].append(int(req["ttft_ms"]))
-            if req.get("decode_toks_per_sec") is not None:
-                b["dec"].append(float(req["decode_toks_per_sec"]))
+            b.success += 1
+            b.lat.append(req[_REQ_LATENCY_MS])
+            b.ttft.append(req[_REQ_TTFT_MS])
+            b.dec.append(req[_REQ_DECODE_TPS])
         elif st == "error":
-            b["error"] = int(b["error"]) + 1
+            b.error += 1
         elif st == "timeout":
-            b["timeout"] = int(b["timeout"]) + 1
-        if req.get("cost_usd") is not None:
-            b["cost"] = float(b["cost"]) + float(req["cost_usd"])
+            b.timeout += 1
+        b.cost += req[_REQ_COST_USD]
 
-    def add_quality(self, q: dict) -> None:
+    def add_quality(self, q: tuple) -> None:
         self.quality_count += 1
 
     def set_deployment_state_current(self, rows: list[dict]) -> None:
@@ -1154,17 +1510,18 @@ class _ReportBuilder:
 
         # Build daily summary table
         daily_rows: list[dict[str, object]] = []
-        for (day_iso, dep_id), b in sorted(self.daily.items()):
-            total = int(b["total"])
-            success = int(b["success"])
-            err = int(b["error"])
-            to = int(b["timeout"])
+        # Keys are unique (day, deployment) pairs: sort on the key alone, never the buckets.
+        for (day_iso, dep_id), b in sorted(self.daily.items(), key=itemgetter(0)):
+            total = b.total
+            success = b.success
+            err = b.error
+            to = b.timeout
             error_rate = (err / total) if total else 0.0
             timeout_rate = (to / total) if total else 0.0
 
-            lat = b["lat"]
-            ttft = b["ttft"]
-            dec = b["dec"]
+            lat_p50, lat_p95 = _p50_p95(b.lat, int)
+            ttft_p50, ttft_p95 = _p50_p95(b.ttft, int)
+            dec_p50, dec_p95 = _p50_p95(b.dec, float)
 
             daily_rows.append(
                 {
@@ -1176,13 +1533,13 @@ class _ReportBuilder:
                     "timeout": to,
                     "error_rate": round(error_rate, 6),
                     "timeout_rate": round(timeout_rate, 6),
-                    "latency_p50_ms": _percentile_int(lat, 0.50),
-                    "latency_p95_ms": _percentile_int(lat, 0.95),
-                    "ttft_p50_ms": _percentile_int(ttft, 0.50),
-                    "ttft_p95_ms": _percentile_int(ttft, 0.95),
-                    "decode_tps_p50": _percentile_float(dec, 0.50),
-                    "decode_tps_p95": _percentile_float(dec, 0.95),
-                    "total_cost_usd": round(float(b["cost"]), 6),
+                    "latency_p50_ms": lat_p50,
+                    "latency_p95_ms": lat_p95,
+                    "ttft_p50_ms": ttft_p50,
+                    "ttft_p95_ms": ttft_p95,
+                    "decode_tps_p50": dec_p50,
+                    "decode_tps_p95": dec_p95,
+                    "total_cost_usd": round(b.cost, 6),
                 }
             )
 
@@ -1212,44 +1569,43 @@ class _ReportBuilder:
         }
 
         json_path = os.path.join(out_dir, "report.json")
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(meta, f, indent=2, sort_keys=True)
+        # Encoded in one call and written once (json.dump with indent streams many tiny writes).
+        # sort_keys keeps reports diffable across runs.
+        Path(json_path).write_text(json.dumps(meta, indent=2, sort_keys=True), encoding="utf-8")
 
-        # Write a readable markdown report
+        # Write a readable markdown report (assembled in memory, written once).
         md_path = os.path.join(out_dir, "report.md")
-        with open(md_path, "w", encoding="utf-8") as f:
-            f.write("# Seed report\n\n")
-            f.write(f"- DB: `{self.db_path}`\n")
-            f.write(f"- Window: `{to_rfc3339_z(self.window_start)}` → `{to_rfc3339_z(self.window_end)}`\n")
-            f.write(f"- Requests/user/day: **{self.cfg.requests_per_user_per_day}**\n")
-            f.write(f"- Days: **{self.cfg.days}**\n")
-            f.write(f"- Total requests: **{self.request_count}**\n")
-            f.write(f"- Quality coverage: **{self.cfg.quality_coverage}** (actual rows: {self.quality_count})\n")
-            f.write(f"- Snapshot computed from last **{self.cfg.window_sec}s** of requests\n\n")
-
-            f.write("## Table counts\n\n")
-            f.write(f"- tiers: 3\n")
-            f.write(f"- models: 3\n")
-            f.write(f"- backends: 3\n")
-            f.write(f"- deployments: {len(self.deployments)}\n")
-            f.write(f"- users: {len(self.users)}\n")
-            f.write(f"- incidents: {len(self.incidents)}\n")
-            f.write(f"- requests: {self.request_count}\n")
-            f.write(f"- quality_scores: {self.quality_count}\n\n")
-
-            f.write("## Current snapshot (deployment_state_current)\n\n")
-            if self.dep_state_current:
-                for r in sorted(self.dep_state_current, key=lambda x: x["deployment_id"]):
-                    f.write(
-                        f"- `{r['deployment_id']}` status={r['status']} samples={r['sample_count']} "
-                        f"p50={r['latency_p50_ms']}ms p95={r['latency_p95_ms']}ms "
-                        f"err={r['error_rate']} timeout={r['timeout_rate']} "
-                        f"ttft_p50={r['ttft_p50_ms']} decode_p50={r['decode_toks_per_sec_p50']}\n"
-                    )
-            f.write("\n")
-
-            f.write("## Daily performance summary (p50/p95)\n\n")
-            f.write("See `report.json` for full details (daily metrics + per-day perf schedule).\n")
+        parts = [
+            "# Seed report\n\n",
+            f"- DB: `{self.db_path}`\n",
+            f"- Window: `{to_rfc3339_z(self.window_start)}` → `{to_rfc3339_z(self.window_end)}`\n",
+            f"- Requests/user/day: **{self.cfg.requests_per_user_per_day}**\n",
+            f"- Days: **{self.cfg.days}**\n",
+            f"- Total requests: **{self.request_count}**\n",
+            f"- Quality coverage: **{self.cfg.quality_coverage}** (actual rows: {self.quality_count})\n",
+            f"- Snapshot computed from last **{self.cfg.window_sec}s** of requests\n\n",
+            "## Table counts\n\n",
+            "- tiers: 3\n",
+            "- models: 3\n",
+            "- backends: 3\n",
+            f"- deployments: {len(self.deployments)}\n",
+            f"- users: {len(self.users)}\n",
+            f"- incidents: {len(self.incidents)}\n",
+            f"- requests: {self.request_count}\n",
+            f"- quality_scores: {self.quality_count}\n\n",
+            "## Current snapshot (deployment_state_current)\n\n",
+        ]
+        parts.extend(
+            f"- `{r['deployment_id']}` status={r['status']} samples={r['sample_count']} "
+            f"p50={r['latency_p50_ms']}ms p95={r['latency_p95_ms']}ms "
+            f"err={r['error_rate']} timeout={r['timeout_rate']} "
+            f"ttft_p50={r['ttft_p50_ms']} decode_p50={r['decode_toks_per_sec_p50']}\n"
+            for r in sorted(self.dep_state_current or (), key=itemgetter("deployment_id"))
+        )
+        parts.append("\n")
+        parts.append("## Daily performance summary (p50/p95)\n\n")
+        parts.append("See `report.json` for full details (daily metrics + per-day perf schedule).\n")
+        Path(md_path).write_text("".join(parts), encoding="utf-8")
 
         return out_dir
 
@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import shutil
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from src.db.seed import SeedConfig, seed
+
+
+@pytest.fixture(scope="session")
+def seeded_template(tmp_path_factory: pytest.TempPathFactory) -> str:
+    """
+    Seed the small deterministic DB once per session.
+
+    Tests never write to it directly; they get a private copy via `seeded_db`.
+    Under pytest-xdist every worker is its own session with its own basetemp
+    (.../popen-gwN), so each worker seeds one template and nothing is shared.
+    """
+    db_path = str(tmp_path_factory.mktemp("seed_template") / "template.db")
+    seed(db_path, cfg=SeedConfig(rng_seed=42, days=2, requests_per_user_per_day=10, write_report=False))
+    # seed() leaves the file in WAL mode (persistent), so every reader of every copy would
+    # create -wal/-shm sidecars. Tests only read: switch the template to a rollback journal once.
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        conn.close()
+    return db_path
+
+
+@pytest.fixture
+def seeded_db(seeded_template: str, tmp_path: Path) -> str:
+    """Per-test copy of the seeded template (a file copy instead of re-running seed())."""
+    db_path = str(tmp_path / "context.db")
+    shutil.copyfile(seeded_template, db_path)
+    return db_path
@@ -5,27 +5,13 @@ import pytest
 # The previous non-ReAct agent was moved to src/agent/unsuccessful/.
 pytest.skip("Legacy agent tests (moved to src/agent/unsuccessful/).", allow_module_level=True)
 
-import os
-import tempfile
-
 from src.agent.graph import build_graph
 from src.agent.categories import QueryCategory
 from src.agent.classifier import Classification
 from src.agent.patterns import QueryPattern
-from src.db.seed import SeedConfig, seed
-
-
-def _seed_small_db() -> str:
-    td = tempfile.TemporaryDirectory()
-    db_path = os.path.join(td.name, "context.db")
-    seed(db_path, cfg=SeedConfig(rng_seed=42, days=2, requests_per_user_per_day=10, write_report=False))
-    _seed_small_db._td = td  # type: ignore[attr-defined]
-    return db_path
-
 
-def test_graph_known_system_status_executes_tools_and_formats() -> None:
-    db_path = _seed_small_db()
 
+def test_graph_known_system_status_executes_tools_and_formats(seeded_db: str) -> None:
     def cls(_: str) -> Classification:
         return Classification(category=QueryCategory.STATUS, is_complex=False)
 
@@ -38,7 +24,7 @@ def test_graph_known_system_status_executes_tools_and_formats() -> None:
             return DummyMsg("System looks fine based on the latest snapshot.")
 
     app = build_graph(classifier_override=cls, executor_llm=DummyLLM())
-    out = app.invoke({"query": "system status?", "db_path": db_path})
+    out = app.invoke({"query": "system status?", "db_path": seeded_db})
 
     assert out["category"] == QueryCategory.STATUS
     assert out["category"].value == "STATUS"
@@ -54,9 +40,7 @@ def test_graph_known_system_status_executes_tools_and_formats() -> None:
     assert "Tools used" in resp
 
 
-def test_graph_novel_ops_like_forces_critical_checks() -> None:
-    db_path = _seed_small_db()
-
+def test_graph_novel_ops_like_forces_critical_checks(seeded_db: str) -> None:
     def cls(_: str) -> Classification:
         return Classification(category=QueryCategory.NOVEL, is_complex=True)
 
@@ -65,7 +49,7 @@ def test_graph_novel_ops_like_forces_critical_checks() -> None:
             raise RuntimeError("not used for ops-like enforcement when fallback plan triggers")
 
     app = build_graph(classifier_override=cls, executor_llm=DummyLLM())
-    out = app.invoke({"query": "Why is latency spiking now?", "db_path": db_path})
+    out = app.invoke({"query": "Why is latency spiking now?", "db_path": seeded_db})
 
     # NOVEL path should force critical checks for ops-like queries.
     assert out["category"] == QueryCategory.NOVEL
@@ -74,9 +58,7 @@ def test_graph_novel_ops_like_forces_critical_checks() -> None:
     assert out["response"].startswith("[NOVEL QUERY]")
 
 
-def test_graph_novel_plan_override_is_validated_and_executed() -> None:
-    db_path = _seed_small_db()
-
+def test_graph_novel_plan_override_is_validated_and_executed(seeded_db: str) -> None:
     def cls(_: str) -> Classification:
         return Classification(category=QueryCategory.NOVEL, is_complex=True)
 
@@ -95,7 +77,7 @@ def test_graph_novel_plan_override_is_validated_and_executed() -> None:
             raise RuntimeError("should not be called when plan_override is provided")
 
     app = build_graph(classifier_override=cls, plan_override=plan, executor_llm=DummyLLM())
-    out = app.invoke({"query": "Investigate something odd", "db_path": db_path})
+    out = app.invoke({"query": "Investigate something odd", "db_path": seeded_db})
     assert out["category"] == QueryCategory.NOVEL
     assert "Uncertainties:" in out["response"]
     assert "- test uncertainty" in out["response"]
@@ -105,9 +87,7 @@ def test_graph_novel_plan_override_is_validated_and_executed() -> None:
     assert "get_request_volume" in out["tool_results"]
 
 
-def test_latest_request_question_is_answered_in_natural_language() -> None:
-    db_path = _seed_small_db()
-
+def test_latest_request_question_is_answered_in_natural_language(seeded_db: str) -> None:
     def cls(_: str) -> Classification:
         return Classification(category=QueryCategory.NOVEL, is_complex=True)
 
@@ -128,7 +108,7 @@ def test_latest_request_question_is_answered_in_natural_language() -> None:
             return DummyMsg("The latest request is `req_foo` at `2024-01-01T00:00:00Z`.")
 
     app = build_graph(classifier_override=cls, plan_override=plan, executor_llm=DummyLLM())
-    out = app.invoke({"query": "In the database, what is the latest request?", "db_path": db_path})
+    out = app.invoke({"query": "In the database, what is the latest request?", "db_path": seeded_db})
     resp = out["response"]
     assert "latest request" in resp.lower()
     assert "req_" in resp
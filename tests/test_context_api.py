@@ -1,34 +1,16 @@
 from __future__ import annotations
 
-import os
-import tempfile
+import re
 
 from src.context.api import get_active_incidents, get_deployment_status, get_recent_requests, get_request_detail, get_user_context
 from src.context.api import get_latency_trends
 from src.context.api import get_quality_summary
 from src.context.api import get_request_volume
-from src.db.seed import SeedConfig, seed
+from src.db.connection import connect, fetch_one
 
-
-def _seed_small_db() -> str:
-    td = tempfile.TemporaryDirectory()
-    db_path = os.path.join(td.name, "context.db")
-    seed(db_path, cfg=SeedConfig(rng_seed=42, days=2, requests_per_user_per_day=10, write_report=False))
-    # attach tempdir lifetime to path by stashing on function attribute
-    _seed_small_db._td = td  # type: ignore[attr-defined]
-    return db_path
-
-
-def test_get_deployment_status_shape() -> None:
-    db_path = _seed_small_db()
-    out = get_deployment_status(db_path=db_path)
-    assert "deployments" in out
-    assert "summary" in out
-    assert out["summary"]["total"] == 21
-    assert isinstance(out["deployments"], list)
-    assert out["deployments"], "expected non-empty deployments"
-    d0 = out["deployments"][0]
-    for k in (
+# Keys each tool response row must expose (subset checks: extra keys are fine).
+_DEPLOYMENT_KEYS = frozenset(
+    {
         "id",
         "model_id",
         "backend_id",
@@ -42,33 +24,11 @@ def test_get_deployment_status_shape() -> None:
         "sample_count",
         "updated_at",
         "is_stale",
-    ):
-        assert k in d0
-
-
-def test_get_active_incidents_shape() -> None:
-    db_path = _seed_small_db()
-    out = get_active_incidents(db_path=db_path)
-    assert "incidents" in out
-    assert "count" in out
-    assert isinstance(out["incidents"], list)
-    if out["incidents"]:
-        inc0 = out["incidents"][0]
-        for k in ("id", "target_type", "target_id", "title", "started_at", "duration_minutes"):
-            assert k in inc0
-
-
-def test_get_recent_requests_limit_and_has_more() -> None:
-    db_path = _seed_small_db()
-
-    out = get_recent_requests(db_path=db_path, limit=5)
-    assert "requests" in out and "count" in out and "has_more" in out
-    assert out["count"] == 5
-    assert len(out["requests"]) == 5
-    assert out["has_more"] is True
-
-    r0 = out["requests"][0]
-    for k in (
+    }
+)
+_INCIDENT_KEYS = frozenset({"id", "target_type", "target_id", "title", "started_at", "duration_minutes"})
+_RECENT_REQUEST_KEYS = frozenset(
+    {
         "id",
         "user_id",
         "user_tier",
@@ -80,23 +40,10 @@ def test_get_recent_requests_limit_and_has_more() -> None:
         "cost_usd",
         "status",
         "created_at",
-    ):
-        assert k in r0
-
-
-def test_get_request_detail_shape() -> None:
-    db_path = _seed_small_db()
-    recent = get_recent_requests(db_path=db_path, limit=1)
-    req_id = recent["requests"][0]["id"]
-
-    out = get_request_detail(db_path=db_path, request_id=req_id)
-    assert "request" in out
-    assert out["request"]["id"] == req_id
-    assert "quality_score" in out
-    assert "related_incident" in out
-
-    r = out["request"]
-    for k in (
+    }
+)
+_REQUEST_DETAIL_KEYS = frozenset(
+    {
         "id",
         "user_id",
         "user_tier",
@@ -113,19 +60,10 @@ def test_get_request_detail_shape() -> None:
         "experiment_id",
         "created_at",
         "routing_decision",
-    ):
-        assert k in r
-
-
-def test_get_user_context_shape() -> None:
-    db_path = _seed_small_db()
-    recent = get_recent_requests(db_path=db_path, limit=1)
-    user_id = recent["requests"][0]["user_id"]
-
-    out = get_user_context(db_path=db_path, user_id=user_id)
-    assert "user" in out
-    u = out["user"]
-    for k in (
+    }
+)
+_USER_CONTEXT_KEYS = frozenset(
+    {
         "id",
         "tier",
         "latency_sla_ms",
@@ -133,46 +71,169 @@ def test_get_user_context_shape() -> None:
         "daily_budget_used_usd",
         "daily_budget_remaining_usd",
         "requests_today",
-    ):
-        assert k in u
+    }
+)
+_LATENCY_TREND_KEYS = frozenset(
+    {
+        "period",
+        "deployment_id",
+        "request_count",
+        "latency_p50_ms",
+        "latency_p95_ms",
+        "error_rate",
+    }
+)
+_QUALITY_SUMMARY_KEYS = frozenset(
+    {
+        "model_id",
+        "task_type",
+        "avg_score",
+        "min_score",
+        "max_score",
+        "sample_count",
+    }
+)
+_REQUEST_VOLUME_KEYS = frozenset({"period", "group", "request_count", "total_cost_usd"})
+
+
+def test_get_deployment_status_shape(seeded_db: str) -> None:
+    out = get_deployment_status(db_path=seeded_db)
+    assert "deployments" in out
+    assert "summary" in out
+    assert out["summary"]["total"] == 21
+    deployments = out["deployments"]
+    assert isinstance(deployments, list)
+    assert deployments, "expected non-empty deployments"
+    d0 = deployments[0]
+    assert _DEPLOYMENT_KEYS <= d0.keys()
+
+
+def test_get_active_incidents_shape(seeded_db: str) -> None:
+    out = get_active_incidents(db_path=seeded_db)
+    assert "incidents" in out
+    assert "count" in out
+    incidents = out["incidents"]
+    assert isinstance(incidents, list)
+    if incidents:
+        inc0 = incidents[0]
+        assert _INCIDENT_KEYS <= inc0.keys()
+
+
+def test_get_recent_requests_limit_and_has_more(seeded_db: str) -> None:
+    out = get_recent_requests(db_path=seeded_db, limit=5)
+    assert "requests" in out and "count" in out and "has_more" in out
+    reqs = out["requests"]
+    assert out["count"] == 5
+    assert len(reqs) == 5
+    assert out["has_more"] is True
+
+    r0 = reqs[0]
+    assert _RECENT_REQUEST_KEYS <= r0.keys()
+
+
+def test_get_request_detail_shape(seeded_db: str) -> None:
+    recent = get_recent_requests(db_path=seeded_db, limit=1)
+    req_id = recent["requests"][0]["id"]
+
+    out = get_request_detail(db_path=seeded_db, request_id=req_id)
+    assert "request" in out
+    assert out["request"]["id"] == req_id
+    assert "quality_score" in out
+    assert "related_incident" in out
+
+    r = out["request"]
+    assert _REQUEST_DETAIL_KEYS <= r.keys()
+
+
+def test_get_user_context_shape(seeded_db: str) -> None:
+    recent = get_recent_requests(db_path=seeded_db, limit=1)
+    user_id = recent["requests"][0]["user_id"]
+
+    out = get_user_context(db_path=seeded_db, user_id=user_id)
+    assert "user" in out
+    u = out["user"]
+    assert _USER_CONTEXT_KEYS <= u.keys()
     assert u["id"] == user_id
     assert u["tier"] in ("premium", "standard", "budget")
     assert u["daily_budget_used_usd"] >= 0
     assert u["requests_today"] >= 0
 
 
-def test_get_latency_trends_shape() -> None:
-    db_path = _seed_small_db()
-    out = get_latency_trends(db_path=db_path, since="2 days ago", until="now", granularity="day")
+def test_get_latency_trends_shape(seeded_db: str) -> None:
+    out = get_latency_trends(db_path=seeded_db, since="2 days ago", until="now", granularity="day")
     assert "data" in out and "summary" in out
-    assert isinstance(out["data"], list)
+    data = out["data"]
+    assert isinstance(data, list)
     assert "total_requests" in out["summary"]
-    if out["data"]:
-        d0 = out["data"][0]
-        for k in ("period", "deployment_id", "request_count", "latency_p50_ms", "latency_p95_ms", "error_rate"):
-            assert k in d0
+    if data:
+        d0 = data[0]
+        assert _LATENCY_TREND_KEYS <= d0.keys()
         assert 0.0 <= d0["error_rate"] <= 1.0
 
 
-def test_get_quality_summary_shape() -> None:
-    db_path = _seed_small_db()
-    out = get_quality_summary(db_path=db_path, since="7 days ago", until="now")
+def test_get_quality_summary_shape(seeded_db: str) -> None:
+    out = get_quality_summary(db_path=seeded_db, since="7 days ago", until="now")
     assert "data" in out
-    assert isinstance(out["data"], list)
-    assert out["data"], "expected at least one quality summary row"
-    d0 = out["data"][0]
-    for k in ("model_id", "task_type", "avg_score", "min_score", "max_score", "sample_count"):
-        assert k in d0
+    data = out["data"]
+    assert isinstance(data, list)
+    assert data, "expected at least one quality summary row"
+    d0 = data[0]
+    assert _QUALITY_SUMMARY_KEYS <= d0.keys()
     assert d0["sample_count"] >= 0
 
 
-def test_get_request_volume_shape() -> None:
-    db_path = _seed_small_db()
-    out = get_request_volume(db_path=db_path, group_by="tier", since="2 days ago", until="now", granularity="day")
+def test_get_request_volume_shape(seeded_db: str) -> None:
+    out = get_request_volume(db_path=seeded_db, group_by="tier", since="2 days ago", until="now", granularity="day")
     assert "data" in out and "totals" in out
-    assert isinstance(out["data"], list)
+    data = out["data"]
+    assert isinstance(data, list)
     assert isinstance(out["totals"], dict)
-    if out["data"]:
-        d0 = out["data"][0]
-        for k in ("period", "group", "request_count", "total_cost_usd"):
-            assert k in d0
+    if data:
+        d0 = data[0]
+        assert _REQUEST_VOLUME_KEYS <= d0.keys()
+
+
+def test_get_request_volume_hour_periods_match_created_at(seeded_db: str) -> None:
+    conn = connect(seeded_db)
+    try:
+        # An unparseable created_at inside the window has no epoch bucket: it must be
+        # skipped rather than failing the whole call.
+        with conn:
+            conn.execute(
+                """
+                INSERT INTO requests
+                SELECT 'bad_ts_' || id, '2024-01-14T05:xxZ', user_id, deployment_id, model_id, backend_id,
+                       task_type, input_tokens, output_tokens, latency_ms, ttft_ms, decode_toks_per_sec,
+                       cost_usd, status, error_code, router_version, experiment_id, routing_reason_json
+                FROM requests ORDER BY id LIMIT 1
+                """
+            )
+    finally:
+        conn.close()
+
+    # Hour-aligned window, so every bucket is complete and counts must match exactly.
+    out = get_request_volume(
+        db_path=seeded_db,
+        group_by="deployment",
+        since="2024-01-14T00:00:00Z",
+        until="2024-01-14T23:59:59Z",
+        granularity="hour",
+    )
+    assert out.get("error") is not True
+    data = out["data"]
+    assert data, "expected hourly volume rows"
+    conn = connect(seeded_db)
+    try:
+        for row in data:
+            period = row["period"]
+            assert re.fullmatch(r"\d{4}-\d{2}-\d{2}T\d{2}:00:00Z", period), period
+            # The bucket must line up with the stored created_at hour prefix.
+            stored = fetch_one(
+                conn,
+                "SELECT COUNT(*) AS c FROM requests"
+                " WHERE deployment_id = ? AND SUBSTR(created_at, 1, 13) = ? AND strftime('%s', created_at) IS NOT NULL",
+                [row["group"], period[:13]],
+            )
+            assert stored["c"] == row["request_count"] > 0
+    finally:
+        conn.close()
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
 import os
-import tempfile
-from src.db.connection import connect, fetch_all, fetch_one, init_db
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from src.db.connection import connect, fetch_all, fetch_one, init_db, read_transaction
 
 
 def _schema_path() -> str:
@@ -11,63 +15,97 @@ def _schema_path() -> str:
     return os.path.join(project_root, "src", "db", "schema.sql")
 
 
-def test_init_db_creates_tables_and_indexes() -> None:
-    with tempfile.TemporaryDirectory() as td:
-        db_path = os.path.join(td, "test.db")
-        conn = connect(db_path)
-        try:
-            init_db(conn, schema_path=_schema_path())
-
-            # Tables
-            tables = fetch_all(
-                conn,
-                "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name",
-            )
-            table_names = {t["name"] for t in tables}
-            assert {
-                "tiers",
-                "models",
-                "backends",
-                "deployments",
-                "deployment_state_current",
-                "users",
-                "requests",
-                "incidents",
-                "quality_scores",
-            } <= table_names
-
-            # Indexes (spot-check a couple)
-            indexes = fetch_all(conn, "SELECT name FROM sqlite_master WHERE type='index' ORDER BY name")
-            idx_names = {i["name"] for i in indexes}
-            assert "idx_requests_created" in idx_names
-            assert "idx_incidents_target" in idx_names
-        finally:
-            conn.close()
-
-
-def test_fetch_one_and_fetch_all_return_dicts() -> None:
-    with tempfile.TemporaryDirectory() as td:
-        db_path = os.path.join(td, "test.db")
-        conn = connect(db_path)
-        try:
-            init_db(conn, schema_path=_schema_path())
-
-            # Insert minimal row into tiers/users (required for FK tests later)
-            conn.execute(
-                "INSERT INTO tiers (id, latency_sla_p95_ms, sla_window_sec, max_error_rate, max_timeout_rate) VALUES (?, ?, ?, ?, ?)",
-                ("premium", 500, 300, 0.03, 0.02),
-            )
-            conn.execute(
-                "INSERT INTO users (id, tier_id, daily_budget_usd) VALUES (?, ?, ?)",
-                ("user_1", "premium", 10.0),
-            )
-            conn.commit()
-
-            one = fetch_one(conn, "SELECT id, tier_id FROM users WHERE id = ?", ["user_1"])
-            assert one == {"id": "user_1", "tier_id": "premium"}
-
-            many = fetch_all(conn, "SELECT id FROM users ORDER BY id")
-            assert many == [{"id": "user_1"}]
-        finally:
-            conn.close()
+def _bootstrap_minimal(conn: sqlite3.Connection) -> None:
+    """Insert one tier and one user (enough for FK-dependent rows) in a single transaction."""
+    with conn:
+        conn.executemany(
+            "INSERT INTO tiers (id, latency_sla_p95_ms, sla_window_sec, max_error_rate, max_timeout_rate) VALUES (?, ?, ?, ?, ?)",
+            [("premium", 500, 300, 0.03, 0.02)],
+        )
+        conn.executemany(
+            "INSERT INTO users (id, tier_id, daily_budget_usd) VALUES (?, ?, ?)",
+            [("user_1", "premium", 10.0)],
+        )
+
+
+def test_init_db_creates_tables_and_indexes(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    try:
+        init_db(conn, schema_path=_schema_path())
+
+        # Tables
+        tables = fetch_all(
+            conn,
+            "SELECT name FROM sqlite_master WHERE type='table' ORDER BY name",
+        )
+        table_names = {t["name"] for t in tables}
+        assert {
+            "tiers",
+            "models",
+            "backends",
+            "deployments",
+            "deployment_state_current",
+            "users",
+            "requests",
+            "incidents",
+            "quality_scores",
+        } <= table_names
+
+        # Indexes (spot-check a couple)
+        indexes = fetch_all(conn, "SELECT name FROM sqlite_master WHERE type='index' ORDER BY name")
+        idx_names = {i["name"] for i in indexes}
+        assert "idx_requests_created" in idx_names
+        assert "idx_incidents_target" in idx_names
+    finally:
+        conn.close()
+
+
+def test_fetch_one_and_fetch_all_return_dicts(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "test.db")
+    conn = connect(db_path)
+    try:
+        init_db(conn, schema_path=_schema_path())
+
+        _bootstrap_minimal(conn)
+
+        one = fetch_one(conn, "SELECT id, tier_id FROM users WHERE id = ?", ["user_1"])
+        assert one == {"id": "user_1", "tier_id": "premium"}
+
+        many = fetch_all(conn, "SELECT id FROM users ORDER BY id")
+        assert many == [{"id": "user_1"}]
+    finally:
+        conn.close()
+
+
+def test_read_transaction_commits_rolls_back_and_nests(tmp_path: Path) -> None:
+    conn = connect(str(tmp_path / "test.db"), autocommit=True)
+    try:
+        init_db(conn, schema_path=_schema_path())
+        tier_sql = "INSERT INTO tiers (id, latency_sla_p95_ms, sla_window_sec, max_error_rate, max_timeout_rate) VALUES (?, 500, 300, 0.03, 0.02)"
+
+        # COMMIT on normal exit.
+        with read_transaction(conn):
+            assert conn.in_transaction
+            conn.execute(tier_sql, ("premium",))
+        assert not conn.in_transaction
+
+        # ROLLBACK when the body raises; the exception propagates.
+        with pytest.raises(RuntimeError):
+            with read_transaction(conn):
+                conn.execute(tier_sql, ("standard",))
+                raise RuntimeError("boom")
+        assert not conn.in_transaction
+
+        # Nested use is a no-op: the outer transaction owns the rollback.
+        with pytest.raises(RuntimeError):
+            with read_transaction(conn):
+                with read_transaction(conn):
+                    conn.execute(tier_sql, ("budget",))
+                assert conn.in_transaction  # inner exit did not COMMIT
+                raise RuntimeError("boom")
+        assert not conn.in_transaction
 
+        assert fetch_all(conn, "SELECT id FROM tiers ORDER BY id") == [{"id": "premium"}]
+    finally:
+        conn.close()
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+import threading
+
+import pytest
+
+from src.context.parallel import run_parallel
+
+
+def test_run_parallel_returns_results_in_argument_order() -> None:
+    second_done = threading.Event()
+
+    def first() -> str:
+        # Finishes last: waits until the second callable has returned.
+        assert second_done.wait(timeout=5)
+        return "first"
+
+    def second() -> str:
+        second_done.set()
+        return "second"
+
+    assert run_parallel(first, second) == ["first", "second"]
+
+
+def test_run_parallel_raises_first_failing_callable_in_argument_order() -> None:
+    second_failed = threading.Event()
+
+    def first() -> None:
+        assert second_failed.wait(timeout=5)
+        raise ValueError("first")
+
+    def second() -> None:
+        second_failed.set()
+        raise KeyError("second")
+
+    # The second callable fails earlier in time, but the error surfaces as in a serial run.
+    with pytest.raises(ValueError, match="first"):
+        run_parallel(first, second)
+
+
+def test_run_parallel_single_callable_runs_inline() -> None:
+    assert run_parallel(threading.get_ident) == [threading.get_ident()]
+    assert run_parallel() == []
@@ -1,21 +1,12 @@
 from __future__ import annotations
 
-import os
-import tempfile
+import threading
+import time
 from typing import Any
 
 from langchain_core.messages import AIMessage, ToolMessage
 
-from src.agent.react_loop_graph import build_react_graph
-from src.db.seed import SeedConfig, seed
-
-
-def _seed_small_db() -> str:
-    td = tempfile.TemporaryDirectory()
-    db_path = os.path.join(td.name, "context.db")
-    seed(db_path, cfg=SeedConfig(rng_seed=42, days=2, requests_per_user_per_day=10, write_report=False))
-    _seed_small_db._td = td  # type: ignore[attr-defined]
-    return db_path
+from src.agent.react_loop_graph import ToolRegistry, build_react_graph
 
 
 class DummyToolLLM:
@@ -29,8 +20,9 @@ class DummyToolLLM:
         return self
 
     def invoke(self, messages: list[Any]):
-        # If we already have at least one tool observation, stop.
-        if any(isinstance(m, ToolMessage) for m in messages):
+        # If we already have at least one tool observation, stop. The loop appends
+        # observations right before re-planning, so only the last message needs checking.
+        if isinstance(messages[-1], ToolMessage):
             return AIMessage(content="Based on the tools, there is 1 active incident.")
         # Otherwise call a tool.
         return AIMessage(
@@ -43,7 +35,7 @@ class DummyMultiToolLLM(DummyToolLLM):
     """Emits two tool calls in one step, then answers."""
 
     def invoke(self, messages: list[Any]):
-        if any(isinstance(m, ToolMessage) for m in messages):
+        if isinstance(messages[-1], ToolMessage):
             return AIMessage(content="Incidents checked and deployment status checked.")
         return AIMessage(
             content="",
@@ -63,32 +55,66 @@ class DummyInfiniteToolLLM(DummyToolLLM):
         return AIMessage(content="", tool_calls=[{"id": "tc1", "name": "get_active_incidents", "args": {}}])
 
 
-def test_react_loop_executes_tool_and_stops() -> None:
-    db_path = _seed_small_db()
-    app = build_react_graph(llm=DummyToolLLM(), max_steps=10)
-    out = app.invoke({"query": "Are there any active incidents?", "db_path": db_path})
+# Compiled once per module: the stubs carry no per-run state and db_path is passed per invoke.
+_APP_SINGLE = build_react_graph(llm=DummyToolLLM(), max_steps=10)
+_APP_INFINITE = build_react_graph(llm=DummyInfiniteToolLLM(), max_steps=2)
+_APP_MULTI = build_react_graph(llm=DummyMultiToolLLM(), max_steps=10)
+
+
+def test_react_loop_executes_tool_and_stops(seeded_db: str) -> None:
+    out = _APP_SINGLE.invoke({"query": "Are there any active incidents?", "db_path": seeded_db})
     assert "response" in out
     assert "active incident" in (out["response"] or "").lower()
     assert out.get("tools_used") == ["get_active_incidents"]
     assert out.get("tool_calls") and out["tool_calls"][0]["tool_name"] == "get_active_incidents"
 
 
-def test_react_loop_stops_at_max_steps() -> None:
-    db_path = _seed_small_db()
-    app = build_react_graph(llm=DummyInfiniteToolLLM(), max_steps=2)
-    out = app.invoke({"query": "Keep going forever", "db_path": db_path})
+def test_react_loop_stops_at_max_steps(seeded_db: str) -> None:
+    out = _APP_INFINITE.invoke({"query": "Keep going forever", "db_path": seeded_db})
     # We should still produce *some* response at the hard stop.
     assert "response" in out
     assert isinstance(out["response"], str)
     assert "max steps reached" in out["response"].lower()
 
 
-def test_react_loop_can_execute_multiple_tools_in_one_step() -> None:
-    db_path = _seed_small_db()
-    app = build_react_graph(llm=DummyMultiToolLLM(), max_steps=10)
-    out = app.invoke({"query": "system status?", "db_path": db_path})
+def test_react_loop_can_execute_multiple_tools_in_one_step(seeded_db: str) -> None:
+    out = _APP_MULTI.invoke({"query": "system status?", "db_path": seeded_db})
     assert "response" in out
     assert "deployment" in out["response"].lower()
     assert out.get("tools_used") == ["get_active_incidents", "get_deployment_status"]
     assert [c["tool_name"] for c in out.get("tool_calls", [])] == ["get_active_incidents", "get_deployment_status"]
 
+
+def test_react_loop_runs_custom_registry_tools_serially_in_order(seeded_db: str) -> None:
+    ran: list[str] = []
+    active = [0, 0]  # [currently running, max seen]
+    lock = threading.Lock()
+
+    def _record(name: str) -> None:
+        with lock:
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+            ran.append(name)
+        time.sleep(0.02)  # wide enough for an overlapping call to show up
+        with lock:
+            active[0] -= 1
+
+    def get_active_incidents(db_path: str | None = None) -> dict[str, Any]:
+        """Record the call."""
+        _record("get_active_incidents")
+        return {"incidents": [], "count": 0}
+
+    def get_deployment_status(db_path: str | None = None) -> dict[str, Any]:
+        """Record the call."""
+        _record("get_deployment_status")
+        return {"deployments": [], "summary": {}}
+
+    registry = ToolRegistry(
+        tools={"get_active_incidents": get_active_incidents, "get_deployment_status": get_deployment_status}
+    )
+    app = build_react_graph(registry=registry, llm=DummyMultiToolLLM(), max_steps=10)
+    out = app.invoke({"query": "system status?", "db_path": seeded_db})
+    assert out.get("tools_used") == ["get_active_incidents", "get_deployment_status"]
+    # Caller-supplied tools are not assumed thread-safe: never overlapped, ran in call order.
+    assert ran == ["get_active_incidents", "get_deployment_status"]
+    assert active[1] == 1
@@ -1,64 +1,119 @@
 from __future__ import annotations
 
-import os
-import tempfile
+import random
+from dataclasses import replace
+from datetime import datetime, timezone
+from pathlib import Path
 
 from src.db.connection import connect, fetch_one
-from src.db.seed import SeedConfig, seed
-
-
-def test_seed_creates_expected_core_counts() -> None:
-    with tempfile.TemporaryDirectory() as td:
-        db_path = os.path.join(td, "context.db")
-        # Keep test runtime small while exercising schema + determinism.
-        seed(db_path, cfg=SeedConfig(rng_seed=42, days=2, requests_per_user_per_day=10, write_report=False))
-
-        conn = connect(db_path)
-        try:
-            tiers = fetch_one(conn, "SELECT COUNT(*) AS c FROM tiers")
-            models = fetch_one(conn, "SELECT COUNT(*) AS c FROM models")
-            backends = fetch_one(conn, "SELECT COUNT(*) AS c FROM backends")
-            deployments = fetch_one(conn, "SELECT COUNT(*) AS c FROM deployments")
-            dep_state = fetch_one(conn, "SELECT COUNT(*) AS c FROM deployment_state_current")
-            users = fetch_one(conn, "SELECT COUNT(*) AS c FROM users")
-            incidents = fetch_one(conn, "SELECT COUNT(*) AS c FROM incidents")
-            requests = fetch_one(conn, "SELECT COUNT(*) AS c FROM requests")
-            assert tiers["c"] == 3
-            assert models["c"] == 10
-            assert backends["c"] == 3
-            assert deployments["c"] == 21
-            assert dep_state["c"] == 21
-            assert users["c"] == 10
-            assert incidents["c"] == 8
-            assert requests["c"] == 10 * 10 * 2
-        finally:
-            conn.close()
-
-
-def test_seed_is_deterministic_for_key_invariants() -> None:
-    with tempfile.TemporaryDirectory() as td:
-        db1 = os.path.join(td, "a.db")
-        db2 = os.path.join(td, "b.db")
-        cfg = SeedConfig(rng_seed=123, days=2, requests_per_user_per_day=8, write_report=False)
-        seed(db1, cfg=cfg)
-        seed(db2, cfg=cfg)
-
-        c1 = connect(db1)
-        c2 = connect(db2)
-        try:
-            # Same request ids at ends
-            first1 = fetch_one(c1, "SELECT id FROM requests ORDER BY id ASC LIMIT 1")
-            first2 = fetch_one(c2, "SELECT id FROM requests ORDER BY id ASC LIMIT 1")
-            last1 = fetch_one(c1, "SELECT id FROM requests ORDER BY id DESC LIMIT 1")
-            last2 = fetch_one(c2, "SELECT id FROM requests ORDER BY id DESC LIMIT 1")
-            assert first1 == first2
-            assert last1 == last2
-
-            # Same number of quality scores for same seed/config
-            q1 = fetch_one(c1, "SELECT COUNT(*) AS c FROM quality_scores")
-            q2 = fetch_one(c2, "SELECT COUNT(*) AS c FROM quality_scores")
-            assert q1["c"] == q2["c"]
-        finally:
-            c1.close()
-            c2.close()
+from src.db.seed import SeedConfig, _ReportBuilder, _rfc3339_z_from_ts, _triangular_sampler, seed, to_rfc3339_z
 
+
+def test_seed_creates_expected_core_counts(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "context.db")
+    # Keep test runtime small while exercising schema + determinism.
+    seed(db_path, cfg=SeedConfig(rng_seed=42, days=2, requests_per_user_per_day=10, write_report=False))
+
+    conn = connect(db_path)
+    try:
+        counts = fetch_one(
+            conn,
+            """
+            SELECT
+              (SELECT COUNT(*) FROM tiers) AS tiers,
+              (SELECT COUNT(*) FROM models) AS models,
+              (SELECT COUNT(*) FROM backends) AS backends,
+              (SELECT COUNT(*) FROM deployments) AS deployments,
+              (SELECT COUNT(*) FROM deployment_state_current) AS dep_state,
+              (SELECT COUNT(*) FROM users) AS users,
+              (SELECT COUNT(*) FROM incidents) AS incidents,
+              (SELECT COUNT(*) FROM requests) AS requests
+            """,
+        )
+        assert counts == {
+            "tiers": 3,
+            "models": 10,
+            "backends": 3,
+            "deployments": 21,
+            "dep_state": 21,
+            "users": 10,
+            "incidents": 8,
+            "requests": 10 * 10 * 2,
+        }
+    finally:
+        conn.close()
+
+
+def test_seed_is_deterministic_for_key_invariants(tmp_path: Path) -> None:
+    db1 = str(tmp_path / "a.db")
+    db2 = str(tmp_path / "b.db")
+    cfg = SeedConfig(rng_seed=123, days=2, requests_per_user_per_day=8, write_report=False)
+    seed(db1, cfg=cfg)
+    seed(db2, cfg=cfg)
+
+    c1 = connect(db1)
+    c2 = connect(db2)
+    try:
+        # Same request ids at ends, and the same number of quality scores for same seed/config
+        invariants_sql = """
+            SELECT
+              (SELECT MIN(id) FROM requests) AS first_request_id,
+              (SELECT MAX(id) FROM requests) AS last_request_id,
+              (SELECT COUNT(*) FROM quality_scores) AS quality_scores
+        """
+        assert fetch_one(c1, invariants_sql) == fetch_one(c2, invariants_sql)
+    finally:
+        c1.close()
+        c2.close()
+
+
+def test_seed_with_workers_is_deterministic(tmp_path: Path) -> None:
+    db1 = str(tmp_path / "a.db")
+    db2 = str(tmp_path / "b.db")
+    cfg = SeedConfig(rng_seed=7, days=2, requests_per_user_per_day=8, write_report=False)
+    seed(db1, cfg=replace(cfg, workers=2))
+    seed(db2, cfg=replace(cfg, workers=3))
+
+    c1 = connect(db1)
+    c2 = connect(db2)
+    try:
+        sql = "SELECT COUNT(*) AS c, SUM(latency_ms) AS lat, MAX(created_at) AS last FROM requests"
+        r1 = fetch_one(c1, sql)
+        assert r1["c"] == 10 * 8 * 2
+        assert r1 == fetch_one(c2, sql)
+        q_sql = "SELECT COUNT(*) AS c, SUM(score) AS s FROM quality_scores"
+        assert fetch_one(c1, q_sql) == fetch_one(c2, q_sql)
+    finally:
+        c1.close()
+        c2.close()
+
+
+def test_triangular_sampler_matches_random_triangular() -> None:
+    ref = random.Random(99)
+    fast = random.Random(99)
+    draw = _triangular_sampler(fast.random, 50, 1200, 300)
+    assert [draw() for _ in range(1000)] == [ref.triangular(50, 1200, 300) for _ in range(1000)]
+
+
+def test_rfc3339_z_from_ts_matches_to_rfc3339_z() -> None:
+    start = int(datetime(2023, 12, 31, 23, 0, 0, tzinfo=timezone.utc).timestamp())
+    for ts in range(start, start + 3 * 86400, 997):
+        assert _rfc3339_z_from_ts(ts) == to_rfc3339_z(datetime.fromtimestamp(ts, tz=timezone.utc))
+
+
+def test_report_writes_without_deployment_state_snapshot(tmp_path: Path) -> None:
+    cfg = SeedConfig()
+    rep = _ReportBuilder(
+        cfg=cfg,
+        db_path=str(tmp_path / "context.db"),
+        window_start=cfg.base_now,
+        window_end=cfg.base_now,
+        deployments=[],
+        users=[],
+        incidents=[],
+        perf_schedule={},
+    )
+    # set_deployment_state_current() never called: the snapshot section is just empty.
+    out_dir = rep.write(report_dir=str(tmp_path / "reports"))
+    md = (Path(out_dir) / "report.md").read_text(encoding="utf-8")
+    assert "## Current snapshot (deployment_state_current)\n\n\n## Daily performance summary" in md
@@ -0,0 +1,180 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Iterator
+
+import pytest
+
+from src.context import trends
+from src.context._common import parse_rfc3339_z
+from src.context.trends import get_latency_trends
+from src.db.connection import connect
+
+
+@pytest.fixture(autouse=True)
+def _empty_bucket_cache() -> Iterator[None]:
+    # The closed-bucket cache is process-global; keep every test independent of the others.
+    trends._bucket_cache.clear()
+    yield
+    trends._bucket_cache.clear()
+
+
+def _add_requests(db_path: str, *, like_id: str, created_at: str, latency_ms: object, count: int) -> None:
+    """Insert `count` copies of an existing request at `created_at` (late rows landing in a bucket)."""
+    conn = connect(db_path)
+    try:
+        with conn:
+            for i in range(count):
+                conn.execute(
+                    """
+                    INSERT INTO requests
+                    SELECT ? || id, ?, user_id, deployment_id, model_id, backend_id, task_type,
+                           input_tokens, output_tokens, ?, ttft_ms, decode_toks_per_sec, cost_usd,
+                           'success', NULL, router_version, experiment_id, routing_reason_json
+                    FROM requests WHERE id = ?
+                    """,
+                    (f"late{i}_", created_at, latency_ms, like_id),
+                )
+    finally:
+        conn.close()
+
+
+def _first_request_in(db_path: str, *, period: str, deployment_id: str, step: timedelta) -> str:
+    start = parse_rfc3339_z(period)
+    conn = connect(db_path)
+    try:
+        row = conn.execute(
+            "SELECT id FROM requests WHERE deployment_id = ? AND created_at >= ? AND created_at < ? ORDER BY id LIMIT 1",
+            (deployment_id, period, (start + step).strftime("%Y-%m-%dT%H:%M:%SZ")),
+        ).fetchone()
+    finally:
+        conn.close()
+    return row["id"]
+
+
+# A whole closed day of the seeded window: every hourly bucket is closed and fully inside.
+_CLOSED_DAY = {"since": "2024-01-14T00:00:00Z", "until": "2024-01-15T00:00:00Z", "granularity": "hour"}
+
+
+def test_latency_trends_repeat_call_is_served_identically_from_cache(seeded_db: str) -> None:
+    first = get_latency_trends(db_path=seeded_db, **_CLOSED_DAY)
+    assert first["data"], "expected hourly buckets in the seeded window"
+    assert len(trends._bucket_cache) == len(first["data"])
+
+    second = get_latency_trends(db_path=seeded_db, **_CLOSED_DAY)
+    assert second == first
+
+
+def test_latency_trends_recomputes_closed_bucket_when_late_rows_land(seeded_db: str) -> None:
+    before = get_latency_trends(db_path=seeded_db, **_CLOSED_DAY)["data"][0]
+    period, dep = before["period"], before["deployment_id"]
+    like_id = _first_request_in(seeded_db, period=period, deployment_id=dep, step=timedelta(hours=1))
+
+    # Outnumber the existing rows so both p50 and p95 must move to the new latency.
+    n = before["request_count"]
+    _add_requests(seeded_db, like_id=like_id, created_at=period, latency_ms=999_999, count=2 * n + 1)
+
+    after = next(
+        r
+        for r in get_latency_trends(db_path=seeded_db, **_CLOSED_DAY)["data"]
+        if (r["period"], r["deployment_id"]) == (period, dep)
+    )
+    assert after["request_count"] == 3 * n + 1
+    assert after["latency_p50_ms"] == 999_999
+    assert after["latency_p95_ms"] == 999_999
+
+
+def test_latency_trends_recomputes_when_rewrite_keeps_moment_statistics(seeded_db: str) -> None:
+    day = {"since": "2024-01-14T00:00:00Z", "until": "2024-01-15T00:00:00Z", "granularity": "day"}
+
+    def _bucket(dep: str) -> dict:
+        return next(r for r in get_latency_trends(db_path=seeded_db, **day)["data"] if r["deployment_id"] == dep)
+
+    conn = connect(seeded_db)
+    try:
+        dep = conn.execute(
+            "SELECT deployment_id FROM requests WHERE created_at >= ? AND created_at < ?"
+            " GROUP BY deployment_id HAVING COUNT(*) >= 5 ORDER BY deployment_id LIMIT 1",
+            (day["since"], day["until"]),
+        ).fetchone()["deployment_id"]
+        ids = [
+            r["id"]
+            for r in conn.execute(
+                "SELECT id FROM requests WHERE deployment_id = ? AND created_at >= ? AND created_at < ? ORDER BY id",
+                (dep, day["since"], day["until"]),
+            ).fetchall()
+        ]
+        # Exactly five latencies in the bucket; any other rows carry none.
+        with conn:
+            conn.execute(
+                f"UPDATE requests SET latency_ms = NULL WHERE id IN ({', '.join('?' * len(ids))})", ids
+            )
+            for req_id, latency in zip(ids, (100, 102, 106, 107, 110)):
+                conn.execute("UPDATE requests SET latency_ms = ? WHERE id = ?", (latency, req_id))
+        assert _bucket(dep)["latency_p50_ms"] == 106  # now cached
+
+        # {102, 106, 107} -> {103, 104, 108}: same count, sum, sum of squares, min and max.
+        with conn:
+            for req_id, latency in zip(ids[1:4], (103, 104, 108)):
+                conn.execute("UPDATE requests SET latency_ms = ? WHERE id = ?", (latency, req_id))
+    finally:
+        conn.close()
+
+    after = _bucket(dep)
+    assert after["latency_p50_ms"] == 104
+    trends._bucket_cache.clear()
+    assert after == _bucket(dep)
+
+
+def test_latency_trends_skips_malformed_latency_values(seeded_db: str) -> None:
+    before = get_latency_trends(db_path=seeded_db, **_CLOSED_DAY)["data"][0]
+    period, dep = before["period"], before["deployment_id"]
+    like_id = _first_request_in(seeded_db, period=period, deployment_id=dep, step=timedelta(hours=1))
+    # INTEGER affinity keeps these as TEXT / REAL: one bad row must not fail the whole call.
+    _add_requests(seeded_db, like_id=like_id, created_at=period, latency_ms="n/a", count=1)
+
+    out = get_latency_trends(db_path=seeded_db, **_CLOSED_DAY)
+    assert out.get("error") is not True
+    after = next(r for r in out["data"] if (r["period"], r["deployment_id"]) == (period, dep))
+    assert after["request_count"] == before["request_count"] + 1
+    assert (after["latency_p50_ms"], after["latency_p95_ms"]) == (before["latency_p50_ms"], before["latency_p95_ms"])
+
+
+def test_latency_trends_never_caches_partial_or_open_buckets(seeded_db: str) -> None:
+    # A late row makes 17:30 the DB "now", so the 17:00 bucket is still open.
+    like_id = _first_request_in(
+        seeded_db, period="2024-01-14T00:00:00Z", deployment_id="gpt-4/aws", step=timedelta(days=1)
+    )
+    _add_requests(seeded_db, like_id=like_id, created_at="2024-01-15T17:30:00Z", latency_ms=500, count=1)
+
+    out = get_latency_trends(db_path=seeded_db, since="2024-01-14T00:30:00Z", until="now", granularity="hour")
+    periods = {r["period"] for r in out["data"]}
+    assert "2024-01-15T17:00:00Z" in periods
+
+    cached_periods = {key[2] for key in trends._bucket_cache}
+    assert cached_periods, "expected the closed buckets to be cached"
+    # The bucket cut by `since` (00:00-01:00) and the one containing "now" (17:00) are recomputed each call.
+    assert "2024-01-14T00:00:00Z" not in cached_periods
+    assert "2024-01-15T17:00:00Z" not in cached_periods
+
+
+def test_contiguous_ranges_merges_adjacent_buckets() -> None:
+    periods = ["2024-01-14T00:00:00Z", "2024-01-14T01:00:00Z", "2024-01-14T03:00:00Z"]
+    ranges = list(trends._contiguous_ranges(periods, step=timedelta(hours=1)))
+    assert ranges == [
+        (parse_rfc3339_z("2024-01-14T00:00:00Z"), parse_rfc3339_z("2024-01-14T02:00:00Z")),
+        (parse_rfc3339_z("2024-01-14T03:00:00Z"), parse_rfc3339_z("2024-01-14T04:00:00Z")),
+    ]
+    assert list(trends._contiguous_ranges([], step=timedelta(hours=1))) == []
+
+
+def test_bucket_cache_evicts_least_recently_used(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(trends, "_BUCKET_CACHE_MAXSIZE", 2)
+    trends._store_bucket_percentiles(("a",), (1, 2))
+    trends._store_bucket_percentiles(("b",), (3, 4))
+    assert trends._cached_bucket_percentiles(("a",)) == (1, 2)  # touch: "b" is now the oldest
+    trends._store_bucket_percentiles(("c",), (5, 6))
+
+    assert trends._cached_bucket_percentiles(("b",)) is None
+    assert trends._cached_bucket_percentiles(("a",)) == (1, 2)
+    assert trends._cached_bucket_percentiles(("c",)) == (5, 6)